@@ -0,0 +1,177 @@
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import polars as pl
+
+from icd10_validator import code_ids, normalize_codes
+
+## instrumentation.py (stage timers, off unless enabled) lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..')))
+from instrumentation import timed  # noqa: E402
+
+## Inputs: CMS 2025 tabular XML (chapter -> section/block -> diag -> nested diag)
+tabular_file_path = 'Assignment_1/medical-codex-pipeline/input/icd10cm_tabular_2025.xml'
+hierarchy_output_path = 'Assignment_1/medical-codex-pipeline/outputs/icd10cm_hierarchy.parquet'
+
+## Levels every code rolls up to; 'category' is the 3-character code (F41), 'block' the section (F40-F48)
+ROLLUP_LEVELS = ['chapter', 'block', 'category']
+
+
+### ---------------------------------------------------------------------------
+### Build the hierarchy table
+### ---------------------------------------------------------------------------
+
+@timed()
+def build_hierarchy(path=tabular_file_path):
+    """Flatten the tabular XML into one row per node, numbered in pre-order.
+
+    Pre-order numbering means every node's descendants are exactly the ids
+    node_id + 1 .. last_descendant, so "everything under F40-F48" is an integer
+    interval. chapter_id / block_id / category_id are the precomputed ancestor
+    arrays used for rollups (-1 when a level doesn't apply, e.g. a chapter has no block).
+    """
+    root = ET.parse(path).getroot()
+    rows = []
+
+    def add(element, kind, code, parent, chapter, block, category):
+        node_id = len(rows)
+        desc = element.findtext('desc', default='').strip()
+        row = {'node_id': node_id, 'code': code, 'kind': kind, 'description': desc, 'parent_id': parent,
+               'chapter_id': chapter, 'block_id': block, 'category_id': category, 'last_descendant': node_id}
+        rows.append(row)
+        return node_id, row
+
+    def walk_diags(element, parent, chapter, block, category):
+        for diag in element.findall('diag'):
+            code = diag.findtext('name', default='').strip().upper().replace('.', '')
+            node_id, row = add(diag, 'category' if len(code) == 3 else 'code',
+                               code, parent, chapter, block, category)
+            if len(code) == 3:
+                row['category_id'] = category_here = node_id
+            else:
+                category_here = category
+            walk_diags(diag, node_id, chapter, block, category_here)
+            row['last_descendant'] = len(rows) - 1
+
+    for chapter in root.findall('chapter'):
+        chapter_id, chapter_row = add(chapter, 'chapter', chapter.findtext('name', default='').strip(),
+                                      -1, -1, -1, -1)
+        chapter_row['chapter_id'] = chapter_id
+        for section in chapter.findall('section'):
+            block_id, block_row = add(section, 'block', section.get('id', ''), chapter_id, chapter_id, -1, -1)
+            block_row['block_id'] = block_id
+            walk_diags(section, block_id, chapter_id, block_id, -1)
+            block_row['last_descendant'] = len(rows) - 1
+        chapter_row['last_descendant'] = len(rows) - 1
+
+    return pl.DataFrame(rows, schema={
+        'node_id': pl.Int32, 'code': pl.String, 'kind': pl.String, 'description': pl.String,
+        'parent_id': pl.Int32, 'chapter_id': pl.Int32, 'block_id': pl.Int32, 'category_id': pl.Int32,
+        'last_descendant': pl.Int32,
+    })
+
+
+@timed()
+def compile_hierarchy(path=tabular_file_path, output_path=hierarchy_output_path):
+    hierarchy = build_hierarchy(path)
+    hierarchy.write_parquet(output_path)
+    print(f"Output saved to {output_path}")
+    return hierarchy
+
+
+@timed()
+def load_hierarchy(path=hierarchy_output_path):
+    return pl.read_parquet(path)
+
+
+### ---------------------------------------------------------------------------
+### Code -> node lookups
+### ---------------------------------------------------------------------------
+
+def _code_index(hierarchy):
+    """Sorted diagnosis codes and the node id for each, for searchsorted lookups."""
+    diags = hierarchy.filter(pl.col('kind').is_in(['category', 'code'])).sort('code')
+    return diags.get_column('code').to_numpy(), diags.get_column('node_id').to_numpy()
+
+
+def node_ids(codes, hierarchy):
+    """Node id for every code in a (polars or pandas) Series, dotted or not; -1 when not in the tabular."""
+    sorted_codes, sorted_nodes = _code_index(hierarchy)
+    pos = code_ids(normalize_codes(codes).to_numpy(), sorted_codes)
+    return np.where(pos >= 0, sorted_nodes[np.maximum(pos, 0)], -1).astype(np.int32)
+
+
+def find_node(hierarchy, name, kind=None):
+    """Look up one node by code ('F41.9', 'F41'), block id ('F40-F48') or chapter number ('5')."""
+    name = name.strip().upper()
+    if kind is None and '-' not in name and not name.isdigit():
+        name = name.replace('.', '')
+    matches = hierarchy.filter(pl.col('code') == name)
+    if kind is not None:
+        matches = matches.filter(pl.col('kind') == kind)
+    if matches.height == 0:
+        raise KeyError(f"{name} is not in the ICD-10-CM tabular")
+    return matches.row(0, named=True)
+
+
+def descendant_range(hierarchy, name, kind=None):
+    """(first, last) node ids covered by a node - the node itself and all of its descendants."""
+    node = find_node(hierarchy, name, kind)
+    return node['node_id'], node['last_descendant']
+
+
+def descendants_expr(node_col, hierarchy, name, kind=None):
+    """Polars filter for rows whose node id falls under `name` - an interval check instead of LIKE 'F4%'."""
+    first, last = descendant_range(hierarchy, name, kind)
+    return pl.col(node_col).is_between(first, last)
+
+
+def descendants_sql(node_col, hierarchy, name, kind=None):
+    """Same filter as a SQL predicate, for tables that store the node id."""
+    first, last = descendant_range(hierarchy, name, kind)
+    return f"{node_col} BETWEEN {first} AND {last}"
+
+
+### ---------------------------------------------------------------------------
+### Rollups
+### ---------------------------------------------------------------------------
+
+def rollup(frame, code_col, hierarchy, patient_col=None, levels=ROLLUP_LEVELS):
+    """Counts at every hierarchy level in one group-by.
+
+    Each row's node id is mapped through the ancestor arrays for every level,
+    the (level node, row) pairs are stacked, and a single group-by counts rows
+    (or distinct patients when `patient_col` is given) per node.
+    """
+    nodes = node_ids(frame.get_column(code_col) if isinstance(frame, pl.DataFrame) else frame[code_col],
+                     hierarchy)
+    mapped = nodes >= 0
+    ancestors = {level: hierarchy.get_column(f'{level}_id').to_numpy() for level in levels}
+
+    stacked = pl.DataFrame({
+        'node_id': np.concatenate([ancestors[level][nodes[mapped]] for level in levels]),
+        **({'patient': np.tile(np.asarray(frame[patient_col])[mapped], len(levels))} if patient_col else {}),
+    }).filter(pl.col('node_id') >= 0)
+
+    agg = pl.col('patient').n_unique() if patient_col else pl.len()
+    counts = stacked.group_by('node_id').agg(agg.alias('count'))
+    return hierarchy.select('node_id', 'kind', 'code', 'description') \
+        .join(counts, on='node_id', how='inner') \
+        .rename({'kind': 'level'}) \
+        .sort('node_id')
+
+
+if __name__ == "__main__":
+    hierarchy = compile_hierarchy()
+
+    patients = pl.read_csv('Assignment_2_DBS/patients.csv')
+
+    ## Patients per chapter / block / category
+    print(rollup(patients, 'primary_icd10', hierarchy, patient_col='patient_id'))
+
+    ## All anxiety and other non-psychotic mental disorders (F40-F48), as an interval on node ids
+    patients = patients.with_columns(pl.Series('icd10_node', node_ids(patients.get_column('primary_icd10'), hierarchy)))
+    print(patients.filter(descendants_expr('icd10_node', hierarchy, 'F40-F48')))
+    print(descendants_sql('icd10_node', hierarchy, 'F40-F48'))
@@ -0,0 +1,138 @@
+import os
+import sys
+
+import numpy as np
+import polars as pl
+
+## instrumentation.py (stage timers, off unless enabled) lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..')))
+from instrumentation import timed  # noqa: E402
+
+## Inputs: CMS 2025 order file (every code, with a billable/header flag)
+## https://www.cms.gov/medicare/coding-billing/icd-10-codes -> "Code Descriptions in Tabular Order"
+order_file_path = 'Assignment_1/medical-codex-pipeline/input/icd10cm_order_2025.txt'
+code_set_output_path = 'Assignment_1/medical-codex-pipeline/outputs/icd10cm_small.csv'
+
+## Undotted ICD-10-CM shape: letter, digit, then 1-5 alphanumerics (A00, E119, C810A, S72001A)
+ICD10_PATTERN = r'^[A-Z][0-9][0-9A-Z]{1,5}$'
+
+
+### ---------------------------------------------------------------------------
+### Code set - the "codex dictionary": sorted unique codes, id = position
+### ---------------------------------------------------------------------------
+
+@timed()
+def load_order_file(path=order_file_path):
+    """Parse the fixed-width order file with vectorized string slicing (no Python loop per line).
+
+    Layout: order number (1-5), code (7-13), header flag (15: 0 = header, 1 = billable),
+    short description (17-76), long description (78-).
+    """
+    lines = pl.read_csv(path, has_header=False, new_columns=['line'], separator='\x1f',
+                        quote_char=None, encoding='utf8-lossy')
+    return lines.select(
+        pl.col('line').str.slice(6, 7).str.strip_chars().alias('code'),
+        (pl.col('line').str.slice(14, 1) == '1').alias('is_billable'),
+        pl.col('line').str.slice(16, 60).str.strip_chars().alias('short_description'),
+        pl.col('line').str.slice(77).str.strip_chars().alias('description'),
+    ).sort('code')
+
+
+@timed()
+def compile_code_set(path=order_file_path, output_path=code_set_output_path):
+    """Build the code set from the order file and save it next to the other codex outputs."""
+    code_set = load_order_file(path).select('code', 'is_billable', 'description') \
+        .with_columns(pl.lit("2025-09-03").alias('last_updated'))
+    code_set.write_csv(output_path)
+    print(f"Output saved to {output_path}")
+    return code_set
+
+
+@timed()
+def load_code_set(path=code_set_output_path):
+    """Load the compiled code set, sorted by code so row position doubles as the code id."""
+    return pl.read_csv(path, schema_overrides={'code': pl.String, 'is_billable': pl.Boolean}).sort('code')
+
+
+### ---------------------------------------------------------------------------
+### Normalization (whole columns at once)
+### ---------------------------------------------------------------------------
+
+def normalize_expr(col):
+    """Polars expression: 'e11.9 ' -> 'E119'. Works in eager, lazy and streaming queries."""
+    return pl.col(col).str.strip_chars().str.to_uppercase().str.replace_all(r'[.\s]', '')
+
+
+def normalize_codes(values):
+    """Normalize a polars or pandas Series of ICD-10 codes to the undotted upper-case form."""
+    if isinstance(values, pl.Series):
+        return values.str.strip_chars().str.to_uppercase().str.replace_all(r'[.\s]', '')
+    return values.str.strip().str.upper().str.replace(r'[.\s]', '', regex=True)
+
+
+def format_dotted(code):
+    """'E119' -> 'E11.9' (the dot always goes after the 3-character category)."""
+    return code if len(code) <= 3 else f"{code[:3]}.{code[3:]}"
+
+
+### ---------------------------------------------------------------------------
+### Validation
+### ---------------------------------------------------------------------------
+
+def code_ids(values, sorted_codes):
+    """Integer code id for each normalized value via searchsorted on the sorted code array; -1 if unknown."""
+    ## Fixed-width bytes keep the comparisons in C; 8 bytes so an over-long value can't truncate into a match
+    values = np.asarray(values).astype('S8')
+    sorted_codes = np.asarray(sorted_codes).astype('S8')
+    pos = np.searchsorted(sorted_codes, values)
+    pos_clipped = np.minimum(pos, len(sorted_codes) - 1)
+    found = sorted_codes[pos_clipped] == values
+    return np.where(found, pos_clipped, -1)
+
+
+def validate_codes(frame, code_col, code_set):
+    """Add normalized code, code id and a status column to a polars DataFrame or LazyFrame.
+
+    status is one of: 'valid' (billable), 'header' (exists but is a non-billable
+    category/subcategory), 'invalid' (well-formed but not in the 2025 code set),
+    'malformed' (not shaped like an ICD-10-CM code) or 'missing' (null/blank).
+    The lookup is a single hash join against the code set, so it runs in one pass.
+    """
+    lookup = code_set.lazy().select(
+        pl.col('code').alias('_code'),
+        pl.int_range(pl.len(), dtype=pl.Int32).alias(f'{code_col}_id'),
+        pl.col('is_billable').alias('_is_billable'),
+    )
+    is_lazy = isinstance(frame, pl.LazyFrame)
+    normalized = f'{code_col}_normalized'
+    result = frame.lazy().with_columns(normalize_expr(code_col).alias(normalized)) \
+        .join(lookup, left_on=normalized, right_on='_code', how='left', maintain_order='left') \
+        .with_columns(
+            pl.when(pl.col(normalized).is_null() | (pl.col(normalized) == '')).then(pl.lit('missing'))
+            .when(pl.col('_is_billable')).then(pl.lit('valid'))
+            .when(pl.col('_is_billable').not_()).then(pl.lit('header'))
+            .when(pl.col(normalized).str.contains(ICD10_PATTERN)).then(pl.lit('invalid'))
+            .otherwise(pl.lit('malformed'))
+            .alias(f'{code_col}_status')
+        ).drop('_is_billable')
+    return result if is_lazy else result.collect()
+
+
+def validate_claims_file(input_path, output_path, code_col, code_set):
+    """Stream a claims CSV through the validator into Parquet without loading it all in memory."""
+    validate_codes(pl.scan_csv(input_path, infer_schema=False), code_col, code_set) \
+        .sink_parquet(output_path)
+    print(f"Output saved to {output_path}")
+
+
+if __name__ == "__main__":
+    code_set = compile_code_set()
+
+    ## Check the primary diagnosis codes in the patients table
+    patients = pl.read_csv('Assignment_2_DBS/patients.csv')
+    checked = validate_codes(patients, 'primary_icd10', code_set)
+
+    print(checked.group_by('primary_icd10_status').len().sort('len', descending=True))
+    print("\nCodes that are not billable 2025 codes:")
+    print(checked.filter(pl.col('primary_icd10_status') != 'valid')
+          .group_by('primary_icd10', 'primary_icd10_status').len().sort('primary_icd10'))
@@ -0,0 +1,470 @@
+import math
+import multiprocessing
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import polars as pl
+
+## instrumentation.py (stage timers, off unless enabled) lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..')))
+from instrumentation import timed  # noqa: E402
+
+## Inputs: the CMS 2025 XML files and the XSDs shipped with them
+## https://www.cms.gov/medicare/coding-billing/icd-10-codes -> "Code Tables, Tabular and Index"
+## The drug, external cause and neoplasm XMLs ship with the XSDs; the large tabular and index
+## files go in input/ (like icd10_hierarchy's tabular file). Each file is taken from the first
+## directory that has it.
+xsd_dir = 'Assignment_1/In_Class/2025 Code Tables, Tabular and Index'
+xml_input_dirs = ['Assignment_1/medical-codex-pipeline/input', xsd_dir]
+xml_output_path = 'Assignment_1/medical-codex-pipeline/outputs/icd10cm_xml_2025.parquet'
+
+## source -> (XML file, XSD it follows)
+SOURCES = {
+    'tabular': ('icd10cm_tabular_2025.xml', 'icd10cm_tabular.xsd'),
+    'index': ('icd10cm_index_2025.xml', 'icd10cm_index.xsd'),
+    'eindex': ('icd10cm_eindex_2025.xml', 'icd10cm_index.xsd'),
+    'drug': ('icd10cm_drug_2025.xml', 'icd10cm_drug_neoplasm.xsd'),
+    'neoplasm': ('icd10cm_neoplasm_2025.xml', 'icd10cm_drug_neoplasm.xsd'),
+}
+
+XS = '{http://www.w3.org/2001/XMLSchema}'
+INTEGER_TYPES = {'integer', 'int', 'long', 'short', 'positiveInteger', 'nonNegativeInteger'}
+MAX_ISSUES = 1000
+
+
+### ---------------------------------------------------------------------------
+### Schema model from the XSD
+### ---------------------------------------------------------------------------
+### Every element declaration compiles to a dict:
+###   kind       'simple' (text only), 'mixed' (text + inline elements) or 'complex'
+###   dtype      polars dtype of the text, for simple elements
+###   attributes name -> {'dtype', 'required', 'enum', 'min', 'max'}
+###   children   tag  -> {'info': <compiled child>, 'max': maximum occurrences (inf = unbounded)}
+
+def _local(name):
+    return name.split(':')[-1] if name else name
+
+
+def _simple_type(node, schema_types):
+    """Constraints of an xsd:simpleType / type name: {'dtype', 'enum', 'min', 'max'}."""
+    if node is None:
+        return {'dtype': pl.String, 'enum': None, 'min': None, 'max': None}
+    if isinstance(node, str):
+        name = _local(node)
+        if name in schema_types['simple']:
+            return _simple_type(schema_types['simple'][name], schema_types)
+        return {'dtype': pl.Int32 if name in INTEGER_TYPES else pl.String, 'enum': None, 'min': None, 'max': None}
+    restriction = node.find(f'{XS}restriction')
+    if restriction is None:
+        return _simple_type(None, schema_types)
+    spec = _simple_type(restriction.get('base'), schema_types)
+    enum = [e.get('value') for e in restriction.findall(f'{XS}enumeration')]
+    if enum:
+        spec['enum'] = enum
+        if set(enum) == {'true', 'false'}:
+            spec['dtype'] = pl.Boolean
+    for facet, key in (('minInclusive', 'min'), ('maxInclusive', 'max')):
+        bound = restriction.find(f'{XS}{facet}')
+        if bound is not None:
+            spec[key] = int(bound.get('value'))
+    return spec
+
+
+def _type_of(decl):
+    """Inline xsd:simpleType of an element / attribute declaration, else its type name."""
+    inline = decl.find(f'{XS}simpleType')
+    return inline if inline is not None else decl.get('type') or 'string'
+
+
+def load_schema(xsd_path):
+    """Compile an XSD into {'root': tag, 'elements': {tag: compiled}, 'records': [tags]}."""
+    schema = ET.parse(xsd_path).getroot()
+    types = {
+        'complex': {node.get('name'): node for node in schema.findall(f'{XS}complexType')},
+        'simple': {node.get('name'): node for node in schema.findall(f'{XS}simpleType')},
+        'group': {node.get('name'): node for node in schema.findall(f'{XS}group')},
+        'element': {node.get('name'): node for node in schema.findall(f'{XS}element')},
+    }
+    compiled = {}
+
+    def compile_element(decl):
+        if decl.get('ref'):
+            decl = types['element'][_local(decl.get('ref'))]
+        if id(decl) in compiled:
+            return compiled[id(decl)]
+        info = compiled[id(decl)] = {'kind': 'simple', 'dtype': pl.String, 'attributes': {}, 'children': {}}
+        type_name = _local(decl.get('type'))
+        if type_name in types['complex']:
+            compile_complex(types['complex'][type_name], info)
+        elif decl.find(f'{XS}complexType') is not None:
+            compile_complex(decl.find(f'{XS}complexType'), info)
+        else:
+            info['dtype'] = _simple_type(_type_of(decl), types)['dtype']
+        return info
+
+    def compile_complex(node, info):
+        info['kind'] = 'mixed' if node.get('mixed') == 'true' else 'complex'
+        for child in node:
+            if child.tag in (f'{XS}complexContent', f'{XS}simpleContent'):
+                extension = child.find(f'{XS}extension')
+                if child.tag == f'{XS}simpleContent':
+                    info['kind'] = 'simple'
+                elif extension is not None and _local(extension.get('base')) in types['complex']:
+                    base = types['complex'][_local(extension.get('base'))]
+                    compile_complex(base, info)
+                    if node.get('mixed') == 'true':
+                        info['kind'] = 'mixed'
+                if extension is not None:
+                    compile_particles(extension, info, 1)
+                    compile_attributes(extension, info)
+            elif child.tag in (f'{XS}sequence', f'{XS}choice', f'{XS}all', f'{XS}group'):
+                compile_particle(child, info, 1)
+        compile_attributes(node, info)
+
+    def compile_attributes(node, info):
+        for attribute in node.findall(f'{XS}attribute'):
+            spec = _simple_type(_type_of(attribute), types)
+            spec['required'] = attribute.get('use') == 'required'
+            info['attributes'][attribute.get('name')] = spec
+
+    def occurs(node):
+        value = node.get('maxOccurs', '1')
+        return math.inf if value == 'unbounded' else int(value)
+
+    def compile_particles(node, info, repeat):
+        for child in node:
+            if child.tag in (f'{XS}sequence', f'{XS}choice', f'{XS}all', f'{XS}group', f'{XS}element'):
+                compile_particle(child, info, repeat)
+
+    def compile_particle(node, info, repeat):
+        repeat = repeat * occurs(node)
+        if node.tag == f'{XS}element':
+            tag = _local(node.get('ref') or node.get('name'))
+            previous = info['children'].get(tag)
+            info['children'][tag] = {'info': compile_element(node),
+                                     'max': repeat + (previous['max'] if previous else 0)}
+        elif node.tag == f'{XS}group':
+            compile_particles(types['group'][_local(node.get('ref'))], info, repeat)
+        else:
+            compile_particles(node, info, repeat)
+
+    elements = {name: compile_element(decl) for name, decl in types['element'].items()}
+
+    ## Root: the one global element no other element declares as a child
+    referenced = {tag for info in compiled.values() for tag in info['children']}
+    root = next(name for name in elements if name not in referenced and elements[name]['children'])
+    return {'root': root, 'elements': elements, 'records': _record_tags(root, elements)}
+
+
+def _record_tags(root, elements):
+    """Elements that become rows: recursive elements (diag, term) and every element that contains one.
+
+    Only element-only content counts - the tabular contentType nests <diff> in
+    itself, but that is markup inside a text, not a hierarchy level.
+    """
+    structural = {tag for tag, info in elements.items() if info['kind'] == 'complex'}
+
+    def reachable(tag):
+        seen, todo = set(), list(elements[tag]['children'])
+        while todo:
+            child = todo.pop()
+            if child not in seen and child in structural:
+                seen.add(child)
+                todo.extend(elements[child]['children'])
+        return seen
+
+    reach = {tag: reachable(tag) for tag in structural}
+    recursive = {tag for tag in structural if tag in reach[tag]}
+    return [tag for tag in elements
+            if tag in structural and tag != root and (tag in recursive or reach[tag] & recursive)]
+
+
+### ---------------------------------------------------------------------------
+### Extraction plan: element -> typed columns
+### ---------------------------------------------------------------------------
+### For a record element:
+###   attributes                      -> one typed column each
+###   text child (max 1)              -> String / typed column, plus <child>_<sub> for its inline elements (nemod)
+###   repeated text child (cell)      -> List column, plus List columns for its attributes (cell_col)
+###   container child (excludes1/note*, sevenChrDef/extension*) -> List column per repeated text element
+###   record child                    -> its own rows, linked by parent_id
+
+def _is_text(info):
+    return info['kind'] in ('simple', 'mixed')
+
+
+def extraction_plan(info, records):
+    """(columns, handlers): columns name -> polars dtype; handlers tag -> list of (column, how, key)."""
+    columns, handlers = {}, {}
+
+    def add(name, dtype, tag, how, key=None):
+        while name in columns:
+            name = f'{name}_'
+        columns[name] = dtype
+        handlers.setdefault(tag, []).append((name, how, key))
+
+    for attribute, spec in info['attributes'].items():
+        add(attribute, spec['dtype'], None, 'attribute', attribute)
+    for tag, child in info['children'].items():
+        if tag in records:
+            continue
+        child_info = child['info']
+        if _is_text(child_info) and child['max'] == 1:
+            add(tag, child_info['dtype'] if child_info['kind'] == 'simple' else pl.String, tag, 'text')
+            for sub, sub_child in child_info['children'].items():
+                if sub_child['info']['kind'] == 'simple' and not sub_child['info']['children']:
+                    add(f'{tag}_{sub}', pl.String, tag, 'subtext', sub)
+            for attribute, spec in child_info['attributes'].items():
+                add(f'{tag}_{attribute}', spec['dtype'], tag, 'child_attribute', attribute)
+        elif _is_text(child_info):
+            add(tag, pl.List(pl.String), tag, 'list')
+            for attribute, spec in child_info['attributes'].items():
+                add(f'{tag}_{attribute}', pl.List(spec['dtype']), tag, 'list_attribute', attribute)
+        else:
+            subs = {sub: s for sub, s in child_info['children'].items() if _is_text(s['info'])}
+            for sub, sub_child in subs.items():
+                name = tag if len(subs) == 1 else f'{tag}_{sub}'
+                add(name, pl.List(pl.String), tag, 'container', sub)
+                for attribute, spec in sub_child['info']['attributes'].items():
+                    add(f'{name}_{attribute}', pl.List(spec['dtype']), tag, 'container_attribute', (sub, attribute))
+    return columns, handlers
+
+
+### ---------------------------------------------------------------------------
+### Streaming parse + validation of one file
+### ---------------------------------------------------------------------------
+
+_SPACE = re.compile(r'\s+')
+
+
+def _text(element):
+    return _SPACE.sub(' ', ''.join(element.itertext())).strip()
+
+
+def _convert(value, spec):
+    """Typed attribute value, or raise ValueError when it breaks the XSD facets."""
+    if spec['enum'] is not None and value not in spec['enum']:
+        raise ValueError(f"{value!r} not in {spec['enum']}")
+    if spec['dtype'] == pl.Boolean:
+        return value == 'true'
+    if spec['dtype'] == pl.Int32:
+        number = int(value)
+        if (spec['min'] is not None and number < spec['min']) or (spec['max'] is not None and number > spec['max']):
+            raise ValueError(f"{number} outside [{spec['min']}, {spec['max']}]")
+        return number
+    return value
+
+
+class _FileParser:
+    def __init__(self, source, schema):
+        self.source, self.schema = source, schema
+        self.records = set(schema['records'])
+        self.plans = {tag: extraction_plan(schema['elements'][tag], self.records) for tag in schema['records']}
+        self.columns = {'record_id': [], 'parent_id': [], 'depth': [], 'element': []}
+        for columns, _ in self.plans.values():
+            for name in columns:
+                self.columns.setdefault(name, [])
+        self.issues = []
+
+    def issue(self, record_id, element, message):
+        if len(self.issues) < MAX_ISSUES:
+            self.issues.append({'source': self.source, 'record_id': record_id, 'element': element,
+                                'message': message})
+
+    def attribute(self, record_id, element, tag, name, spec):
+        value = element.get(name)
+        if value is None:
+            if spec['required']:
+                self.issue(record_id, tag, f"missing required attribute {name}")
+            return None
+        try:
+            return _convert(value, spec)
+        except ValueError as error:
+            self.issue(record_id, tag, f"attribute {name}: {error}")
+            return None
+
+    def emit(self, element, record_id, parent_id, depth):
+        """Row for a finished record element; validates its attributes and direct children."""
+        tag = element.tag
+        info = self.schema['elements'][tag]
+        columns, handlers = self.plans[tag]
+        row = {name: [] if isinstance(dtype, pl.List) else None for name, dtype in columns.items()}
+
+        for name, _, key in handlers.get(None, []):
+            row[name] = self.attribute(record_id, element, tag, key, info['attributes'][key])
+        for attribute in element.attrib:
+            if attribute not in info['attributes']:
+                self.issue(record_id, tag, f"undeclared attribute {attribute}")
+
+        counts = {}
+        for child in element:
+            counts[child.tag] = counts.get(child.tag, 0) + 1
+            declared = info['children'].get(child.tag)
+            if declared is None:
+                self.issue(record_id, tag, f"undeclared child <{child.tag}>")
+                continue
+            for name, how, key in handlers.get(child.tag, []):
+                if how == 'text':
+                    value = _text(child)
+                    row[name] = _convert(value, {**declared['info'], 'enum': None, 'min': None, 'max': None}) \
+                        if declared['info']['kind'] == 'simple' and value else value
+                elif how == 'subtext':
+                    sub = child.find(key)
+                    row[name] = None if sub is None else _text(sub)
+                elif how == 'child_attribute':
+                    row[name] = self.attribute(record_id, child, child.tag, key, declared['info']['attributes'][key])
+                elif how == 'list':
+                    row[name].append(_text(child))
+                elif how == 'list_attribute':
+                    row[name].append(self.attribute(record_id, child, child.tag, key,
+                                                    declared['info']['attributes'][key]))
+                elif how == 'container':
+                    row[name].extend(_text(sub) for sub in child.findall(key))
+                elif how == 'container_attribute':
+                    sub_tag, attribute = key
+                    spec = declared['info']['children'][sub_tag]['info']['attributes'][attribute]
+                    row[name].extend(self.attribute(record_id, sub, sub_tag, attribute, spec)
+                                     for sub in child.findall(sub_tag))
+        for child_tag, count in counts.items():
+            declared = info['children'].get(child_tag)
+            if declared is not None and count > declared['max']:
+                self.issue(record_id, tag, f"<{child_tag}> occurs {count} times (max {declared['max']})")
+
+        for name, values in self.columns.items():
+            if name in row:
+                values.append(row[name])
+            elif name == 'record_id':
+                values.append(record_id)
+            elif name == 'parent_id':
+                values.append(parent_id)
+            elif name == 'depth':
+                values.append(depth)
+            elif name == 'element':
+                values.append(tag)
+            else:
+                values.append(None)
+
+    def parse(self, xml_path):
+        """One pass of iterparse; record ids are pre-order, and finished records are cleared from memory."""
+        root_tag = self.schema['root']
+        stack = []  # (element, record_id) of open records
+        next_id = 0
+        root = None
+        for event, element in ET.iterparse(xml_path, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                    if element.tag != root_tag:
+                        self.issue(None, element.tag, f"root element is <{element.tag}>, expected <{root_tag}>")
+                if element.tag in self.records:
+                    stack.append((element, next_id))
+                    next_id += 1
+            elif element.tag in self.records and stack and stack[-1][0] is element:
+                _, record_id = stack.pop()
+                parent_id = stack[-1][1] if stack else None
+                self.emit(element, record_id, parent_id, len(stack))
+                ## Keep the tag (the parent still sees it as a record child) but drop the content
+                element.clear()
+        return root
+
+    def frame(self, root):
+        types = {'record_id': pl.Int32, 'parent_id': pl.Int32, 'depth': pl.Int16, 'element': pl.String}
+        for columns, _ in self.plans.values():
+            types.update(columns)
+        ## Rows are emitted as records close (children first); sort back to document order
+        frame = pl.DataFrame(self.columns, schema={name: types[name] for name in self.columns}).sort('record_id')
+        ## Document-level fields (version, title, indexHeading) are broadcast as doc_* columns
+        if root is not None:
+            doc_columns, doc_handlers = extraction_plan(self.schema['elements'][self.schema['root']], self.records)
+            doc = {}
+            for child in root:
+                for name, how, key in doc_handlers.get(child.tag, []):
+                    if how == 'text':
+                        doc[name] = _text(child)
+                    elif how == 'container':
+                        doc.setdefault(name, []).extend(_text(sub) for sub in child.findall(key))
+            frame = frame.with_columns([pl.lit(value, dtype=doc_columns[name]).alias(f'doc_{name}')
+                                        for name, value in doc.items()])
+        return frame.with_columns(pl.lit(self.source).alias('source')).select('source', pl.exclude('source'))
+
+
+@timed()
+def ingest_file(source, xml_path, xsd_path):
+    """Parse one XML file with the extractors derived from its XSD. Returns (frame, issues, seconds)."""
+    start = time.perf_counter()
+    parser = _FileParser(source, load_schema(xsd_path))
+    root = parser.parse(xml_path)
+    frame = parser.frame(root)
+    ## Columns the schema allows but this file never uses (addenda markers etc.) are dropped
+    frame = frame.select([name for name in frame.columns
+                          if frame.get_column(name).null_count() < frame.height
+                          and not (isinstance(frame.schema[name], pl.List)
+                                   and frame.get_column(name).list.len().sum() == 0)])
+    return frame, parser.issues, time.perf_counter() - start
+
+
+### ---------------------------------------------------------------------------
+### All files at once
+### ---------------------------------------------------------------------------
+
+def _ingest_job(job):
+    return (job[0],) + ingest_file(*job)
+
+
+@timed()
+def ingest_all(input_dirs=None, schema_dir=xsd_dir, output_path=xml_output_path, sources=None,
+               n_jobs=None, strict=False):
+    """Parse every available source file in parallel and write one consolidated Parquet file.
+
+    Files are independent, so each goes to its own worker process and the wall
+    time is roughly that of the largest file. Rows keep their `source`; record_id
+    and parent_id are unique within a source. `input_dirs` is one directory or a
+    list searched in order (default: xml_input_dirs).
+    """
+    input_dirs = [input_dirs] if isinstance(input_dirs, str) else input_dirs or xml_input_dirs
+    jobs = []
+    for source in sources or SOURCES:
+        xml_name, xsd_name = SOURCES[source]
+        found = [path for path in (os.path.join(d, xml_name) for d in input_dirs) if os.path.exists(path)]
+        if found:
+            jobs.append((source, found[0], os.path.join(schema_dir, xsd_name)))
+        else:
+            print(f"Skipping {source}: {xml_name} not found")
+    if not jobs:
+        raise FileNotFoundError(f"No ICD-10-CM XML files found in {', '.join(input_dirs)}")
+
+    start = time.perf_counter()
+    ## Largest file first, so it never waits for a free worker
+    jobs.sort(key=lambda job: -os.path.getsize(job[1]))
+    n_jobs = min(n_jobs or os.cpu_count(), len(jobs))
+    if n_jobs == 1:
+        results = [_ingest_job(job) for job in jobs]
+    else:
+        ## 'spawn' rather than fork: forking a process that already runs polars' thread pool can deadlock
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(_ingest_job, jobs))
+
+    issues = [issue for _, _, file_issues, _ in results for issue in file_issues]
+    for source, frame, file_issues, seconds in results:
+        print(f"  {source:<9} {frame.height:>9,} rows  {len(file_issues):>4} schema issues  {seconds:6.2f}s")
+    if issues and strict:
+        raise ValueError(f"{len(issues)} schema violations, first: {issues[0]}")
+
+    combined = pl.concat([frame for _, frame, _, _ in results], how='diagonal_relaxed')
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    combined.write_parquet(output_path)
+    print(f"Output saved to {output_path} ({combined.height:,} rows, {time.perf_counter() - start:.2f}s)")
+    return combined, issues
+
+
+if __name__ == "__main__":
+    combined, issues = ingest_all()
+    for issue in issues[:20]:
+        print(issue)
+
+    ## e.g. every index entry pointing at a diabetes code, with its main term
+    print(combined.filter(pl.col('code').str.starts_with('E11')).select('source', 'element', 'title', 'code'))
@@ -0,0 +1,376 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import polars as pl
+
+## instrumentation.py (stage timers, off unless enabled) lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..')))
+from instrumentation import timed  # noqa: E402
+
+## Inputs: NPPES full replacement file (same file npi_processor.py reads)
+npi_file_path = 'Assignment_1/medical-codex-pipeline/scripts/npi/npidata_pfile_20050523-20250810.csv'
+## Next to npi_processor.py's npi_small.csv
+search_index_output_path = 'Assignment_1/medical-codex-pipeline/Outputs/npi_search_index.parquet'
+
+NPI_COLUMNS = {
+    'NPI': 'npi',
+    'Provider Last Name (Legal Name)': 'last_name',
+    'Provider First Name': 'first_name',
+}
+
+## Blocking keys: a candidate has to share at least one with the query.
+## Each key tolerates a different kind of error:
+##   soundex_key   - Soundex(last) + first initial  (spelling variants: SMITH / SMYTHE)
+##   metaphone_key - Metaphone(last) + first initial (sound-alikes Soundex splits: CATHY / KATHY, PHILIP / FILIP)
+##   prefix_key    - first 4 of last name + first 2 of first name (typos late in the name that change the codes)
+##   suffix_key    - last 4 of last name + first 2 of first name (typos in the first letters, which every
+##                   other key keeps)
+BLOCKING_KEYS = ['soundex_key', 'metaphone_key', 'prefix_key', 'suffix_key']
+
+## Name similarity = weighted trigram Dice coefficient of last and first names
+LAST_NAME_WEIGHT = 0.6
+FIRST_NAME_WEIGHT = 0.4
+
+## Blocks bigger than this are cut down at search time to the rows whose first names are most
+## like the query's (block sizes are stored in the index)
+MAX_BLOCK_SIZE = 2000
+
+
+### ---------------------------------------------------------------------------
+### Phonetic codes (computed once per distinct name, not per row)
+### ---------------------------------------------------------------------------
+
+_SOUNDEX_CODES = {**dict.fromkeys('BFPV', '1'), **dict.fromkeys('CGJKQSXZ', '2'), **dict.fromkeys('DT', '3'),
+                  'L': '4', **dict.fromkeys('MN', '5'), 'R': '6'}
+
+
+def soundex(name):
+    """American Soundex: 'ROBERT' -> 'R163'. H and W don't separate equal codes, vowels do."""
+    if not name:
+        return ''
+    code, last = name[0], _SOUNDEX_CODES.get(name[0], '')
+    for char in name[1:]:
+        digit = _SOUNDEX_CODES.get(char, '')
+        if digit and digit != last:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in 'HW':
+            last = digit
+    return code.ljust(4, '0')
+
+
+def metaphone(name, max_length=6):
+    """Original Metaphone (Philips, 1990) primary code: 'KNIGHT' -> 'NT', 'PHILIP' / 'FILIP' -> 'FLP'."""
+    if not name:
+        return ''
+    vowels = 'AEIOU'
+    for prefix, replacement in (('AE', 'E'), ('GN', 'N'), ('KN', 'N'), ('PN', 'N'), ('WR', 'R'), ('X', 'S'),
+                                ('WH', 'W')):
+        if name.startswith(prefix):
+            name = replacement + name[len(prefix):]
+            break
+    ## Collapse doubled letters (except C: ACCEPT keeps both)
+    word = name[0] + ''.join(c for p, c in zip(name, name[1:]) if c != p or c == 'C')
+
+    code = ''
+    for i, char in enumerate(word):
+        prev = word[i - 1] if i > 0 else ''
+        nxt = word[i + 1] if i + 1 < len(word) else ''
+        after = word[i + 2] if i + 2 < len(word) else ''
+        if char in vowels:
+            code += char if i == 0 else ''
+        elif char == 'B':
+            code += '' if prev == 'M' and not nxt else 'B'
+        elif char == 'C':
+            if nxt == 'I' and after == 'A' or nxt == 'H':
+                code += 'K' if prev == 'S' else 'X'
+            elif nxt in 'IEY' and nxt:
+                code += '' if prev == 'S' else 'S'
+            else:
+                code += 'K'
+        elif char == 'D':
+            code += 'J' if nxt == 'G' and after in 'EIY' and after else 'T'
+        elif char == 'G':
+            if nxt == 'H' and after and after not in vowels:
+                continue
+            if nxt == 'N' and (not after or word[i + 1:] == 'NED'):
+                continue
+            if prev == 'D' and nxt in 'EIY' and nxt:
+                continue
+            code += 'J' if nxt in 'IEY' and nxt and prev != 'G' else 'K'
+        elif char == 'H':
+            if nxt in vowels and nxt and prev not in 'CGPST':
+                code += 'H'
+        elif char == 'K':
+            code += '' if prev == 'C' else 'K'
+        elif char == 'P':
+            code += 'F' if nxt == 'H' else 'P'
+        elif char == 'Q':
+            code += 'K'
+        elif char == 'S':
+            code += 'X' if nxt == 'H' or (nxt == 'I' and after in ('O', 'A')) else 'S'
+        elif char == 'T':
+            if nxt == 'I' and after in ('O', 'A'):
+                code += 'X'
+            elif nxt == 'H':
+                code += '0'
+            elif not (nxt == 'C' and after == 'H'):
+                code += 'T'
+        elif char == 'V':
+            code += 'F'
+        elif char in 'WY':
+            code += char if nxt in vowels and nxt else ''
+        elif char == 'X':
+            code += 'KS'
+        elif char == 'Z':
+            code += 'S'
+        else:
+            code += char
+        if len(code) >= max_length:
+            break
+    return code[:max_length]
+
+
+### ---------------------------------------------------------------------------
+### Blocking keys
+### ---------------------------------------------------------------------------
+
+def _normalize_name(col):
+    """Upper-case letters only: "O'Brien-Smith" -> 'OBRIENSMITH'."""
+    return pl.col(col).str.to_uppercase().str.replace_all(r'[^A-Z]', '').fill_null('')
+
+
+def add_blocking_keys(frame, last_col='last_name', first_col='first_name'):
+    """Add last_norm, first_norm and the BLOCKING_KEYS columns to a polars DataFrame.
+
+    The phonetic codes run in Python, but only once per distinct last name; the
+    result is joined back, so a registry with millions of rows costs one pass
+    over its few hundred thousand surnames.
+    """
+    frame = frame.with_columns(_normalize_name(last_col).alias('last_norm'),
+                               _normalize_name(first_col).alias('first_norm'))
+    surnames = frame.get_column('last_norm').unique()
+    codes = pl.DataFrame({
+        'last_norm': surnames,
+        '_soundex': [soundex(name) for name in surnames],
+        '_metaphone': [metaphone(name) for name in surnames],
+    })
+    initial = pl.col('first_norm').str.slice(0, 1)
+    first_two = pl.col('first_norm').str.slice(0, 2)
+    return frame.join(codes, on='last_norm', how='left', maintain_order='left').with_columns(
+        pl.concat_str([pl.col('_soundex'), initial]).alias('soundex_key'),
+        pl.concat_str([pl.col('_metaphone'), initial]).alias('metaphone_key'),
+        pl.concat_str([pl.col('last_norm').str.slice(0, 4), first_two]).alias('prefix_key'),
+        pl.concat_str([pl.col('last_norm').str.slice(-4), first_two]).alias('suffix_key'),
+    ).drop('_soundex', '_metaphone')
+
+
+### ---------------------------------------------------------------------------
+### Build / load the index
+### ---------------------------------------------------------------------------
+
+@timed()
+def build_search_index(path=npi_file_path):
+    """Individual providers (entity type 1 has a last name) with normalized names, blocking keys
+    and the size of each row's block (<key>_block)."""
+    providers = pl.scan_csv(path, infer_schema=False) \
+        .select([pl.col(source).alias(target) for source, target in NPI_COLUMNS.items()]) \
+        .filter(pl.col('last_name').is_not_null()) \
+        .collect()
+    return add_blocking_keys(providers).with_columns(
+        pl.col('npi').cast(pl.Int64),
+        *[pl.len().over(key).cast(pl.Int32).alias(f'{key}_block') for key in BLOCKING_KEYS],
+    )
+
+
+@timed()
+def compile_search_index(path=npi_file_path, output_path=search_index_output_path):
+    index = build_search_index(path)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    index.write_parquet(output_path)
+    print(f"Output saved to {output_path}")
+    return index
+
+
+@timed()
+def load_search_index(path=search_index_output_path):
+    return pl.read_parquet(path)
+
+
+### ---------------------------------------------------------------------------
+### Candidate scoring
+### ---------------------------------------------------------------------------
+
+def _trigram_codes(names, width):
+    """Padded trigrams of upper-case names as int32 codes (n x width-2); positions past the name are -1.
+
+    '  ANN ' -> '  A', ' AN', 'ANN', 'NN ' - each trigram is its 3 bytes packed into one integer.
+    """
+    padded = np.char.add(np.char.add('  ', names.astype(str)), ' ').astype(f'S{width}')
+    chars = padded.view(np.uint8).reshape(len(names), width).astype(np.int32)
+    codes = (chars[:, :-2] << 16) | (chars[:, 1:-1] << 8) | chars[:, 2:]
+    lengths = np.char.str_len(padded) - 2
+    codes[np.arange(width - 2) >= lengths[:, None]] = -1
+    codes[codes == 0x202020] = -1  # an empty name has only the all-blank trigram
+    return codes
+
+
+def trigram_similarity(pairs, left_col, right_col, batch_size=20_000):
+    """Trigram Dice coefficient of two name columns, for every row of `pairs`, as a polars Series.
+
+    Only the distinct (left, right) name pairs are scored - a block of SMITHs is
+    one pair, not one per provider. Trigrams are integer codes, so the shared
+    ones are found by broadcasting equality over a batch of pairs at once.
+    """
+    names = pairs.select(left_col, right_col).unique()
+    left = names.get_column(left_col).to_numpy()
+    right = names.get_column(right_col).to_numpy()
+    width = max(np.char.str_len(left.astype(str)).max(initial=0),
+                np.char.str_len(right.astype(str)).max(initial=0)) + 3
+    similarity = np.zeros(len(names))
+    for start in range(0, len(names), batch_size):
+        lc = _trigram_codes(left[start:start + batch_size], width)
+        rc = _trigram_codes(right[start:start + batch_size], width)
+        equal = (lc[:, :, None] == rc[:, None, :]) & (lc[:, :, None] >= 0)
+        shared = equal.any(axis=2).sum(axis=1) + equal.any(axis=1).sum(axis=1)
+        total = (lc >= 0).sum(axis=1) + (rc >= 0).sum(axis=1)
+        similarity[start:start + batch_size] = np.divide(shared, total, out=np.zeros(len(lc)), where=total > 0)
+    scores = names.with_columns(pl.Series('similarity', similarity))
+    return pairs.select(left_col, right_col) \
+        .join(scores, on=[left_col, right_col], how='left', maintain_order='left') \
+        .get_column('similarity')
+
+
+_INDEX_COLUMNS = ['npi', 'last_name', 'first_name', 'last_norm', 'first_norm']
+
+
+def _capped_block_candidates(queries, index, key, max_block_size):
+    """Candidates from blocks larger than max_block_size, cut down to about max_block_size rows per query.
+
+    A very common key (SMITH + J) would otherwise swamp the scoring. Within such a
+    block the distinct first names are scored against the query's first name
+    (trigram similarity, one score per name rather than per provider) and the
+    rows of the best names are kept until the cap is reached; the best name is
+    always kept, so an exact first name is never lost.
+    """
+    big = index.filter(pl.col(f'{key}_block') > max_block_size)
+    first_names = big.group_by(key, 'first_norm').agg(pl.len().alias('_rows'))
+    pairs = queries.select('query_id', key, pl.col('first_norm').alias('query_first')).join(first_names, on=key)
+    if pairs.is_empty():
+        return pl.DataFrame(schema={'query_id': queries.schema['query_id'],
+                                    **{col: index.schema[col] for col in _INDEX_COLUMNS}})
+    kept = pairs.with_columns(trigram_similarity(pairs, 'query_first', 'first_norm').alias('_first_score')) \
+        .sort(['query_id', '_first_score', 'first_norm'], descending=[False, True, False]) \
+        .filter(pl.col('_rows').cum_sum().over('query_id') - pl.col('_rows') < max_block_size)
+    return kept.select('query_id', key, 'first_norm') \
+        .join(big.select(key, *_INDEX_COLUMNS), on=[key, 'first_norm']) \
+        .select('query_id', *_INDEX_COLUMNS)
+
+
+def search_candidates(queries, index, top_k=3, min_score=0.0, max_block_size=MAX_BLOCK_SIZE):
+    """Best registry matches for each query row (which must have query_id + blocking keys).
+
+    Blocking: candidates are the index rows sharing any blocking key with the query
+    (one join per key). Blocks larger than max_block_size are capped by first-name
+    similarity (see _capped_block_candidates) rather than joined whole. Only the
+    candidate pairs are scored.
+    """
+    candidates = pl.concat([
+        frame
+        for key in BLOCKING_KEYS
+        for frame in (
+            queries.select('query_id', key).join(
+                index.filter(pl.col(f'{key}_block') <= max_block_size).select(key, *_INDEX_COLUMNS), on=key
+            ).drop(key),
+            _capped_block_candidates(queries, index, key, max_block_size),
+        )
+    ]).unique(['query_id', 'npi'])
+
+    pairs = candidates.join(queries.select('query_id', pl.col('last_norm').alias('query_last'),
+                                           pl.col('first_norm').alias('query_first')), on='query_id')
+    pairs = pairs.with_columns(
+        (LAST_NAME_WEIGHT * trigram_similarity(pairs, 'query_last', 'last_norm')
+         + FIRST_NAME_WEIGHT * trigram_similarity(pairs, 'query_first', 'first_norm')).alias('score')
+    )
+    return pairs.filter(pl.col('score') >= min_score) \
+        .sort(['query_id', 'score', 'npi'], descending=[False, True, False]) \
+        .group_by('query_id', maintain_order=True).head(top_k) \
+        .select('query_id', 'npi', 'last_name', 'first_name', 'score')
+
+
+def search_provider(index, last_name, first_name='', top_k=10):
+    """Look up one provider by (possibly misspelled) name."""
+    query = add_blocking_keys(pl.DataFrame({'query_id': [0], 'last_name': [last_name], 'first_name': [first_name]}))
+    return search_candidates(query, index, top_k=top_k).drop('query_id')
+
+
+### ---------------------------------------------------------------------------
+### Batch linkage of a roster against the registry
+### ---------------------------------------------------------------------------
+
+_worker_index = None
+
+
+def _init_worker(index_path):
+    ## Each worker reads the index once, instead of it being pickled with every chunk
+    global _worker_index
+    _worker_index = load_search_index(index_path)
+
+
+def _link_chunk(args):
+    queries, top_k, min_score = args
+    return search_candidates(queries, _worker_index, top_k, min_score)
+
+
+@timed()
+def link_roster(roster, last_col, first_col, index_path=search_index_output_path, top_k=1, min_score=0.6,
+                n_jobs=None, chunk_size=5_000):
+    """Match every row of an internal provider roster (polars DataFrame) to registry NPIs.
+
+    Returns the roster with matched_npi, matched_last_name, matched_first_name and
+    match_score (null when nothing scores >= min_score); with top_k > 1 a roster
+    row can appear once per candidate. Chunks of the roster are linked in
+    parallel worker processes.
+    """
+    queries = add_blocking_keys(roster.select(pl.int_range(pl.len()).alias('query_id'),
+                                              pl.col(last_col).alias('last_name'),
+                                              pl.col(first_col).alias('first_name')))
+    chunks = [(queries.slice(start, chunk_size), top_k, min_score) for start in range(0, queries.height, chunk_size)]
+
+    n_jobs = n_jobs or os.cpu_count()
+    if n_jobs == 1 or len(chunks) == 1:
+        _init_worker(index_path)
+        matches = [_link_chunk(chunk) for chunk in chunks]
+    else:
+        ## 'spawn' rather than fork: forking a process that already runs polars' thread pool can deadlock
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(index_path,)) as pool:
+            matches = list(pool.map(_link_chunk, chunks))
+
+    matches = pl.concat(matches).rename({'npi': 'matched_npi', 'last_name': 'matched_last_name',
+                                         'first_name': 'matched_first_name', 'score': 'match_score'})
+    return roster.with_columns(pl.int_range(pl.len()).alias('query_id')) \
+        .join(matches, on='query_id', how='left', maintain_order='left') \
+        .drop('query_id')
+
+
+if __name__ == "__main__":
+    index = compile_search_index()
+    print(f"Indexed {index.height:,} individual providers")
+
+    ## Single lookup with a misspelled name
+    print(search_provider(index, 'Smyth', 'Jon'))
+
+    ## Link a roster (here: a sample of the registry with typos introduced)
+    roster = index.sample(1000, seed=42).select(
+        pl.col('npi').alias('true_npi'),
+        pl.col('last_name').str.replace(r'^(..)(.)(.)', '$1$3$2').alias('last_name'),
+        pl.col('first_name'),
+    )
+    linked = link_roster(roster, 'last_name', 'first_name')
+    print(linked.head())
+    print(f"Correctly linked: {(linked.get_column('matched_npi') == linked.get_column('true_npi')).mean():.1%}")
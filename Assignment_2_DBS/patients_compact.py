@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+## instrumentation.py (stage timers, off unless enabled) lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from instrumentation import timed  # noqa: E402
+
+## Compact in-memory / on-disk version of patients.csv
+## - patient_id 'P0001'        -> int32 1
+## - primary_icd10 'E11.9'     -> categorical whose categories are the shared codex dictionary
+##                                (so the category code IS the codex id and joins are integer joins)
+## - last_cpt '45378'          -> int32
+## - birth_date / last_visit_dt -> datetime64 in memory, int32 days since 1970-01-01 on disk
+
+patients_csv_path = 'Assignment_2_DBS/patients.csv'
+compact_path = 'Assignment_2_DBS/patients_compact.npz'
+## Compiled ICD-10 code set from the codex pipeline (sorted undotted codes, row position = codex id)
+codex_path = 'Assignment_1/medical-codex-pipeline/outputs/icd10cm_small.csv'
+
+DATE_COLUMNS = ['birth_date', 'last_visit_dt']
+
+
+def load_codex_dictionary(path=codex_path):
+    """Sorted undotted ICD-10 codes from the codex output, or None when it hasn't been built yet."""
+    if not os.path.exists(path):
+        return None
+    return np.sort(pd.read_csv(path, usecols=['code'], dtype=str)['code'].to_numpy().astype(str))
+
+
+def encode_icd10(codes, dictionary=None):
+    """Dictionary-encode dotted codes against the codex dictionary.
+
+    Codes missing from the dictionary are appended after it (ids >= len(dictionary)),
+    so nothing is lost and every codex code keeps the same id in every table.
+    """
+    undotted = codes.str.replace('.', '', regex=False)
+    if dictionary is None:
+        dictionary = np.array([], dtype=str)
+    extra = np.setdiff1d(undotted.dropna().unique().astype(str), dictionary)
+    categories = np.concatenate([dictionary, extra])
+    return pd.Categorical(undotted, categories=categories)
+
+
+def decode_icd10(categorical):
+    """Back to the dotted form used in patients.csv (the dot goes after the 3-character category)."""
+    undotted = pd.Series(categorical, dtype=object)
+    return undotted.where(undotted.str.len() <= 3, undotted.str[:3] + '.' + undotted.str[3:])
+
+
+@timed()
+def compact_patients(df, dictionary=None):
+    """Convert the raw string patients table to the compact representation. Returns (compact_df, meta)."""
+    id_prefix = df['patient_id'].str.extract(r'^(\D*)', expand=False).iloc[0]
+    id_width = int(df['patient_id'].str.len().max()) - len(id_prefix)
+
+    compact = pd.DataFrame({
+        'patient_id': df['patient_id'].str[len(id_prefix):].astype(np.int32),
+        'primary_icd10': encode_icd10(df['primary_icd10'], dictionary),
+        'last_cpt': pd.to_numeric(df['last_cpt']).astype(np.int32),
+    })
+    for col in DATE_COLUMNS:
+        compact[col] = pd.to_datetime(df[col], format='%Y-%m-%d').astype('datetime64[s]')
+    compact = compact[list(df.columns)]
+
+    meta = {'id_prefix': id_prefix, 'id_width': id_width, 'columns': list(df.columns),
+            'codex_size': 0 if dictionary is None else len(dictionary)}
+    return compact, meta
+
+
+def expand_patients(compact, meta):
+    """Inverse of compact_patients: the same strings as patients.csv."""
+    df = pd.DataFrame({
+        'patient_id': meta['id_prefix'] + compact['patient_id'].astype(str).str.zfill(meta['id_width']),
+        'primary_icd10': decode_icd10(compact['primary_icd10']),
+        'last_cpt': compact['last_cpt'].astype(str),
+    })
+    for col in DATE_COLUMNS:
+        df[col] = compact[col].dt.strftime('%Y-%m-%d')
+    return df[meta['columns']]
+
+
+@timed()
+def save_compact(compact, meta, path=compact_path):
+    """Write the compact table as plain numpy arrays (int32 everywhere) plus a small JSON header."""
+    arrays = {
+        'patient_id': compact['patient_id'].to_numpy(np.int32),
+        'primary_icd10_codes': compact['primary_icd10'].cat.codes.to_numpy().astype(np.int32),
+        'primary_icd10_dictionary': compact['primary_icd10'].cat.categories.to_numpy().astype(str),
+        'last_cpt': compact['last_cpt'].to_numpy(np.int32),
+    }
+    for col in DATE_COLUMNS:
+        ## int32 days since the epoch (NaT is stored as the int32 minimum)
+        days = compact[col].to_numpy().astype('datetime64[D]').astype(np.int64)
+        days[compact[col].isna().to_numpy()] = np.iinfo(np.int32).min
+        arrays[col] = days.astype(np.int32)
+    np.savez_compressed(path, meta=np.array(json.dumps(meta)), **arrays)
+    print(f"Output saved to {path}")
+
+
+@timed()
+def load_compact(path=compact_path):
+    """Read a file written by save_compact back into the compact DataFrame. Returns (compact_df, meta)."""
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        compact = pd.DataFrame({
+            'patient_id': data['patient_id'],
+            'primary_icd10': pd.Categorical.from_codes(data['primary_icd10_codes'],
+                                                       categories=data['primary_icd10_dictionary']),
+            'last_cpt': data['last_cpt'],
+        })
+        for col in DATE_COLUMNS:
+            days = data[col].astype('datetime64[D]')
+            days[data[col] == np.iinfo(np.int32).min] = np.datetime64('NaT')
+            compact[col] = days.astype('datetime64[s]')
+    return compact[meta['columns']], meta
+
+
+@timed()
+def load_patients(csv_path=patients_csv_path, path=compact_path, dictionary_path=codex_path):
+    """Loader: use the compact file while it is up to date, otherwise rebuild it from the CSV.
+
+    Up to date means newer than the CSV and encoded against the current codex
+    dictionary (not older than it, and with the same number of codes), so the
+    category codes stay codex ids after `codex build` runs.
+    """
+    dictionary = load_codex_dictionary(dictionary_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(csv_path):
+        compact, meta = load_compact(path)
+        if dictionary is None or (os.path.getmtime(path) >= os.path.getmtime(dictionary_path)
+                                  and meta['codex_size'] == len(dictionary)):
+            return compact, meta
+    raw = pd.read_csv(csv_path, dtype=str)
+    compact, meta = compact_patients(raw, dictionary)
+    save_compact(compact, meta, path)
+    return compact, meta
+
+
+if __name__ == "__main__":
+    raw = pd.read_csv(patients_csv_path, dtype=str)
+    compact, meta = compact_patients(raw, load_codex_dictionary())
+
+    raw_mb = raw.memory_usage(deep=True).sum() / 1024 ** 2
+    compact_mb = compact.memory_usage(deep=True).sum() / 1024 ** 2
+    print(compact.dtypes)
+    print(f"\nMemory usage (MB): raw strings {raw_mb:.3f} -> compact {compact_mb:.3f} "
+          f"({raw_mb / compact_mb:.1f}x smaller)")
+
+    save_compact(compact, meta)
+    reloaded, meta = load_compact()
+    print(f"Round trip matches the CSV: {expand_patients(reloaded, meta).astype(object).equals(raw.astype(object))}")
+
+    ## ICD-10 joins on the integer codex id instead of the string
+    print(compact.assign(icd10_id=compact['primary_icd10'].cat.codes).head())
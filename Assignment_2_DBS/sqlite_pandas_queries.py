@@ -1,7 +1,14 @@
+import os
+import sys
+
 import pandas as pd 
 from sqlalchemy import create_engine 
 import gc # garbage collector
 
+## instrumentation.py (stage timers, off unless enabled) lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from instrumentation import stage  # noqa: E402
+
 ## Load in .sql file as string
 with open('Assignment_2_DBS/patient_query.sql', 'r') as file:
     sql_depression_query = file.read()
@@ -10,14 +17,19 @@ db_location = 'example.db'
 
 engine = create_engine(f'sqlite:///{db_location}') # You can eventually add in ursername, port code to the database, password if needed
 
-patients_df = pd.read_csv('Assignment_2_DBS/patients.csv')
+with stage('load patients.csv') as s:
+    patients_df = pd.read_csv('Assignment_2_DBS/patients.csv')
+    s.rows_out = len(patients_df)
 
 patients_df.sample(10) # .sample() method to view random rows of data, keeps information unbiased
 
-patients_df.to_sql('patients_details', con=engine, if_exists='replace', index=False) ## con=engine connection strenth, if_exist=replace table if it already exists, index='False' prevents pandas from writing row indices into the table, index=True would write row indices into the table
+with stage('write patients_details', rows_in=len(patients_df)):
+    patients_df.to_sql('patients_details', con=engine, if_exists='replace', index=False) ## con=engine connection strenth, if_exist=replace table if it already exists, index='False' prevents pandas from writing row indices into the table, index=True would write row indices into the table
 
 #read the data from the database into a pandas Dataframe
-df = pd.read_sql('SELECT * FROM "patients_details"', engine)
+with stage('read patients_details') as s:
+    df = pd.read_sql('SELECT * FROM "patients_details"', engine)
+    s.rows_out = len(df)
 
 # Example query to select all patients with anxiety disorder (ICD-10 code F41.9).
 query_anxiety = "SELECT * FROM 'patients_details' WHERE primary_icd10 = 'F41.9'"
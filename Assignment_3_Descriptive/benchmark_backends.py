@@ -0,0 +1,275 @@
+# ============================================================================
+# PANDAS vs POLARS BENCHMARK FOR THE DESCRIPTIVE TEMPLATES
+# ============================================================================
+# The polars template claims "Faster performance on large datasets" and
+# "More memory efficient operations" - this script measures it. Every
+# analysis step of the templates is implemented once per backend and timed
+# on synthetic data from 1k up to 50M rows. Each (backend, size) pair runs in
+# its own fresh process so peak memory of one run never leaks into another.
+# Timings for a size are only reported once both backends' results for
+# every step have been checked to agree.
+#
+# Usage:
+#   python benchmark_backends.py                                  # full sweep
+#   python benchmark_backends.py --sizes 1000 100000 --repeat 5 --output bench.json
+#   python benchmark_backends.py --output bench.csv               # flat CSV instead of JSON
+
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from descriptive_pipeline import sample_columns
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 50_000_000]
+FLAGS = ['readmission_30d', 'surgery_performed', 'infection_acquired']
+CONTINUOUS = ['age', 'length_of_stay', 'total_charges']
+PERCENTILES = [0.25, 0.50, 0.75, 0.90, 0.95]
+AGE_BINS = [18, 35, 50, 65, 80, 95]
+AGE_LABELS = ['18-34', '35-49', '50-64', '65-79', '80+']
+
+
+# ============================================================================
+# STEP IMPLEMENTATIONS (one per backend, same results)
+# ============================================================================
+
+PANDAS_STEPS = {
+    'missing_summary': lambda df: df.isnull().sum(),
+    'frequency_table': lambda df: pd.DataFrame({
+        'count': df['gender'].value_counts().sort_index(),
+        'relative': df['gender'].value_counts(normalize=True).sort_index(),
+    }).cumsum(),
+    'crosstab': lambda df: pd.crosstab(df['gender'], df['discharge_disposition'], margins=True),
+    'cut_binning': lambda df: pd.cut(df['age'], bins=AGE_BINS, labels=AGE_LABELS).value_counts().sort_index(),
+    'rates': lambda df: pd.concat([df[FLAGS].mean() * 100,
+                                   pd.Series({'mortality': (df['discharge_disposition'] == 'Death').mean() * 100})]),
+    'quantiles': lambda df: df['length_of_stay'].quantile(PERCENTILES),
+    'skew_kurtosis': lambda df: pd.DataFrame({'skew': df[CONTINUOUS].skew(), 'kurtosis': df[CONTINUOUS].kurt()}),
+}
+
+POLARS_STEPS = {
+    'missing_summary': lambda df: df.null_count(),
+    'frequency_table': lambda df: df.group_by('gender').len().sort('gender').with_columns(
+        pl.col('len').cum_sum().alias('count'),
+        (pl.col('len').cum_sum() / pl.col('len').sum()).alias('relative'),
+    ),
+    'crosstab': lambda df: df.group_by('gender', 'discharge_disposition').len().pivot(
+        on='discharge_disposition', index='gender', values='len').fill_null(0),
+    ## polars cut takes the inner breaks and leaves the outer bins open, so ages outside
+    ## (18, 95] - which pandas turns into NaN - are dropped first
+    'cut_binning': lambda df: df.select(
+        pl.col('age').filter(pl.col('age').is_between(AGE_BINS[0], AGE_BINS[-1], closed='right'))
+        .cut(AGE_BINS[1:-1], labels=AGE_LABELS).value_counts(sort=False)),
+    'rates': lambda df: df.select(
+        *[(pl.col(flag).mean() * 100).alias(flag) for flag in FLAGS],
+        ((pl.col('discharge_disposition') == 'Death').mean() * 100).alias('mortality'),
+    ),
+    'quantiles': lambda df: df.select(
+        [pl.col('length_of_stay').quantile(p, interpolation='linear').alias(f'p{int(p * 100)}') for p in PERCENTILES]),
+    'skew_kurtosis': lambda df: df.select(
+        ## bias=False: pandas skew / kurt are the bias-corrected estimators
+        *[pl.col(c).skew(bias=False).alias(f'{c}_skew') for c in CONTINUOUS],
+        *[pl.col(c).kurtosis(bias=False).alias(f'{c}_kurtosis') for c in CONTINUOUS],
+    ),
+}
+
+BACKENDS = {'pandas': PANDAS_STEPS, 'polars': POLARS_STEPS}
+
+
+def build_frame(backend, n, seed=42):
+    """The same synthetic records as a pandas or polars DataFrame."""
+    columns = sample_columns(n, seed)
+    if backend == 'pandas':
+        return pd.DataFrame(columns)
+    ## The NaNs in total_charges are missing values to pandas; polars needs them as nulls
+    return pl.DataFrame(columns, nan_to_null=True)
+
+
+# ============================================================================
+# EQUIVALENCE CHECK
+# ============================================================================
+# Each step's result is flattened to {label: number} so both backends can be
+# compared; timings are only reported for steps whose results agree.
+
+def _flatten(step_name, result):
+    if isinstance(result, pl.DataFrame):
+        if step_name == 'frequency_table':
+            return {(row['gender'], key): row[key] for row in result.iter_rows(named=True)
+                    for key in ('count', 'relative')}
+        if step_name == 'crosstab':
+            return {(row['gender'], column): value for row in result.iter_rows(named=True)
+                    for column, value in row.items() if column != 'gender'}
+        if step_name == 'cut_binning':
+            return {row['age']['age']: row['age']['count'] for row in result.iter_rows(named=True)}
+        if step_name == 'quantiles':
+            return dict(zip(PERCENTILES, result.row(0)))
+        if step_name == 'skew_kurtosis':
+            return {tuple(name.rsplit('_', 1)): value for name, value in result.row(0, named=True).items()}
+        return result.row(0, named=True)
+
+    if step_name == 'frequency_table':
+        return {(gender, key): value for (gender, key), value in result.stack().items()}
+    if step_name == 'crosstab':
+        return {cell: value for cell, value in result.stack().items() if 'All' not in cell}
+    if step_name == 'cut_binning':
+        return {label: count for label, count in result.items() if count}
+    if step_name == 'skew_kurtosis':
+        return {(column, stat): value for (column, stat), value in result.stack().items()}
+    return result.to_dict()
+
+
+def compare_outputs(outputs, rtol=1e-6):
+    """Steps whose flattened results differ between backends; `outputs` is {backend: {step: flat}}."""
+    reference, *others = outputs.values()
+    mismatched = []
+    for step_name, expected in reference.items():
+        for other in others:
+            actual = other[step_name]
+            if expected.keys() != actual.keys() or not np.allclose(
+                    [float(expected[k]) for k in expected], [float(actual[k]) for k in expected], rtol=rtol):
+                mismatched.append(step_name)
+                break
+    return mismatched
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def _current_rss():
+    """Resident set size in bytes (Linux /proc; falls back to the peak from getrusage elsewhere)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        scale = 1 if platform.system() == 'Darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class _PeakSampler:
+    """Poll RSS on a background thread; polars allocates outside Python, so tracemalloc can't see it."""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.start = _current_rss()
+        self.peak = self.start
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _current_rss())
+            time.sleep(self.interval)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss())
+
+
+def run_backend(backend, n, repeat=3, seed=42):
+    """Time every step for one backend at one size; meant to run in a fresh worker process."""
+    df = build_frame(backend, n, seed)
+    frame_mb = (df.memory_usage(deep=True).sum() if backend == 'pandas' else df.estimated_size()) / 1024 ** 2
+
+    records, outputs = [], {}
+    for step_name, func in BACKENDS[backend].items():
+        ## The warm-up call (imports, lazy inits, caches) is not measured; its result is kept for the check
+        outputs[step_name] = _flatten(step_name, func(df))
+        times, peaks = [], []
+        for _ in range(repeat):
+            gc.collect()
+            with _PeakSampler() as sampler:
+                t0 = time.perf_counter()
+                func(df)
+                times.append(time.perf_counter() - t0)
+            peaks.append((sampler.peak - sampler.start) / 1024 ** 2)
+        records.append({
+            'backend': backend,
+            'step': step_name,
+            'rows': n,
+            'frame_mb': round(frame_mb, 3),
+            'wall_s_min': min(times),
+            'wall_s_median': statistics.median(times),
+            'peak_mem_mb': round(max(peaks), 3),
+            'repeat': repeat,
+        })
+    return records, outputs
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, backends=('pandas', 'polars'), repeat=3, seed=42, verbose=True):
+    """Sweep every size and backend, each in a fresh single-use process. Returns the report dict."""
+    results = []
+    for n in sizes:
+        size_records, outputs = {}, {}
+        for backend in backends:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                size_records[backend], outputs[backend] = pool.submit(run_backend, backend, n, repeat, seed).result()
+        mismatched = compare_outputs(outputs) if len(outputs) > 1 else []
+        if mismatched:
+            raise ValueError(f"Backends disagree at {n:,} rows on: {', '.join(mismatched)} - timings not comparable")
+        for backend, records in size_records.items():
+            results.extend(records)
+            if verbose:
+                total = sum(r['wall_s_min'] for r in records)
+                print(f"  {backend:>6} {n:>12,} rows: {total * 1000:10.2f} ms total")
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'pandas': pd.__version__,
+            'polars': pl.__version__,
+            'numpy': np.__version__,
+            'sizes': list(sizes),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def write_report(report, path):
+    """JSON keeps the run metadata; a .csv path gets one flat row per (backend, step, size)."""
+    if path.endswith('.csv'):
+        pd.DataFrame(report['results']).to_csv(path, index=False)
+    else:
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the pandas and polars descriptive steps.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS), default=sorted(BACKENDS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args(argv)
+
+    print(f"Benchmarking {', '.join(args.backends)} on sizes {args.sizes}")
+    report = run_benchmark(args.sizes, args.backends, args.repeat)
+    write_report(report, args.output)
+
+    # Side by side view of the min wall time per step
+    summary = pd.DataFrame(report['results']).pivot_table(
+        index=['rows', 'step'], columns='backend', values='wall_s_min')
+    print((summary * 1000).round(3).rename(columns=lambda c: f'{c}_ms'))
+    print(f"\nReport saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# ============================================================================
+# CONFIDENCE INTERVALS FOR RATES AND SUMMARY STATISTICS
+# ============================================================================
+# STEP 4 and STEP 7 print rates as bare point estimates. Proportions get
+# closed-form intervals (Wilson score or Clopper-Pearson exact), computed for
+# every rate / stratum at once with array math.
+#
+# Medians, IQR and means (LOS, charges) get percentile bootstrap intervals.
+# Instead of looping over resamples, each batch of B replicates is one
+# multinomial weight matrix W (B x distinct values, row = how often each
+# value is drawn):
+#   - means are W @ x / n, a single matrix product
+#   - quantiles come from the cumulative weights over the sorted values,
+#     so no replicate is ever materialised or sorted again
+# Batches are sized to keep W around `max_cells` entries.
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+STATISTICS = ['mean', 'median', 'iqr']
+
+
+# ============================================================================
+# PROPORTIONS (closed form)
+# ============================================================================
+
+def wilson_ci(successes, n, alpha=0.05):
+    """Wilson score interval; `successes` and `n` may be scalars or arrays. Returns (low, high) as proportions."""
+    successes = np.asarray(successes, dtype=float)
+    n = np.asarray(n, dtype=float)
+    z = stats.norm.ppf(1 - alpha / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = successes / n
+        denom = 1 + z ** 2 / n
+        centre = (p + z ** 2 / (2 * n)) / denom
+        half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denom
+    return centre - half, centre + half
+
+
+def exact_ci(successes, n, alpha=0.05):
+    """Clopper-Pearson exact interval from beta quantiles. Returns (low, high) as proportions."""
+    successes = np.asarray(successes, dtype=float)
+    n = np.asarray(n, dtype=float)
+    low = np.where(successes > 0, stats.beta.ppf(alpha / 2, successes, n - successes + 1), 0.0)
+    high = np.where(successes < n, stats.beta.ppf(1 - alpha / 2, successes + 1, n - successes), 1.0)
+    return low, high
+
+
+def proportion_ci(df, flags, by=None, method='wilson', alpha=0.05):
+    """Rate (%) with its CI for each 0/1 flag column, overall or per `by` stratum, as a tidy DataFrame.
+
+    `flags` maps output names to 0/1 columns, or boolean Series aligned with `df`
+    for derived events such as mortality (df['discharge_disposition'] == 'Death').
+    """
+    if not isinstance(flags, dict):
+        flags = {name: name for name in flags}
+    events = pd.DataFrame({name: (df[col] if isinstance(col, str) else col).astype(float)
+                           for name, col in flags.items()})
+    if by is not None:
+        events[by] = df[by]
+        grouped = events.groupby(by, observed=True)
+        successes, totals = grouped.sum(), grouped.count()
+    else:
+        successes, totals = events.sum().to_frame().T, events.count().to_frame().T
+
+    interval = wilson_ci if method == 'wilson' else exact_ci
+    low, high = interval(successes.to_numpy(), totals.to_numpy(), alpha)
+    table = pd.DataFrame({
+        'stratum': np.repeat(successes.index.to_numpy(), successes.shape[1]) if by is not None else 'All',
+        'rate': np.tile(successes.columns.to_numpy(), successes.shape[0]),
+        'events': successes.to_numpy().ravel(),
+        'n': totals.to_numpy().ravel(),
+        'estimate': (successes.to_numpy() / totals.to_numpy()).ravel() * 100,
+        'ci_low': low.ravel() * 100,
+        'ci_high': high.ravel() * 100,
+    })
+    return table
+
+
+# ============================================================================
+# BOOTSTRAP (batched multinomial weights)
+# ============================================================================
+
+def _weighted_quantile(sorted_x, cum_weights, n, q):
+    """Inverted-CDF quantile of every replicate: first sorted value whose cumulative weight reaches q * n."""
+    idx = (cum_weights < q * n).sum(axis=1)
+    return sorted_x[np.minimum(idx, len(sorted_x) - 1)]
+
+
+def _replicate_statistics(values, n_boot, rng, max_cells):
+    """B bootstrap replicates of every statistic in STATISTICS for one sample."""
+    # Work on the distinct values: LOS / age have a few dozen, which makes W tiny
+    x, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    n, k = len(values), len(x)
+    batch = max(1, min(n_boot, max_cells // max(k, n // 4, 1)))
+    out = {name: np.empty(n_boot) for name in STATISTICS}
+    for start in range(0, n_boot, batch):
+        b = min(batch, n_boot - start)
+        if k * 10 <= n:
+            weights = rng.multinomial(n, counts / n, size=b).astype(np.float64)
+        else:
+            ## Same Multinomial(n, 1/n) draw as one bincount of uniform picks - far faster than
+            ## rng.multinomial when almost every value is distinct
+            picks = inverse[rng.integers(0, n, size=(b, n))] + (np.arange(b) * k)[:, None]
+            weights = np.bincount(picks.ravel(), minlength=b * k).reshape(b, k).astype(np.float64)
+        cum = np.cumsum(weights, axis=1)
+        out['mean'][start:start + b] = weights @ x / n
+        q1 = _weighted_quantile(x, cum, n, 0.25)
+        q3 = _weighted_quantile(x, cum, n, 0.75)
+        out['median'][start:start + b] = _weighted_quantile(x, cum, n, 0.5)
+        out['iqr'][start:start + b] = q3 - q1
+    return out
+
+
+def bootstrap_ci(values, groups=None, statistics=STATISTICS, n_boot=2000, alpha=0.05, seed=42,
+                 max_cells=20_000_000):
+    """Percentile bootstrap CIs for mean / median / IQR, overall or per group, as a tidy DataFrame.
+
+    `values` and `groups` may be numpy arrays or pandas / polars Series; nulls are dropped.
+    Point estimates use numpy's default (linear) quantiles; replicates use the
+    inverted-CDF definition, which is what the weights give without re-sorting.
+    """
+    rng = np.random.default_rng(seed)
+    values = np.asarray(values.to_numpy() if hasattr(values, 'to_numpy') else values, dtype=float)
+    if groups is None:
+        labels, codes = np.array(['All']), np.zeros(len(values), dtype=np.int64)
+    else:
+        codes, labels = pd.factorize(groups.to_numpy() if hasattr(groups, 'to_numpy') else np.asarray(groups),
+                                     sort=True)
+    keep = ~np.isnan(values) & (codes >= 0)
+    values, codes = values[keep], codes[keep]
+
+    # One sort puts every group's values next to each other
+    order = np.argsort(codes, kind='stable')
+    values, codes = values[order], codes[order]
+    bounds = np.searchsorted(codes, np.arange(len(labels) + 1))
+
+    rows = []
+    for g, label in enumerate(labels):
+        x = values[bounds[g]:bounds[g + 1]]
+        if len(x) == 0:
+            continue
+        replicates = _replicate_statistics(x, n_boot, rng, max_cells)
+        estimates = {'mean': x.mean(), 'median': np.median(x),
+                     'iqr': np.subtract(*np.quantile(x, [0.75, 0.25]))}
+        for name in statistics:
+            low, high = np.quantile(replicates[name], [alpha / 2, 1 - alpha / 2])
+            rows.append({'group': label, 'statistic': name, 'n': len(x),
+                         'estimate': estimates[name], 'ci_low': low, 'ci_high': high})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    import time
+
+    # Demo: 300 strata x 2000 replicates for LOS
+    n = 300_000
+    rng = np.random.default_rng(0)
+    demo = pd.DataFrame({
+        'unit': rng.integers(0, 300, n),
+        'length_of_stay': rng.lognormal(1.2, 0.8, n).clip(1, 30).astype(int),
+        'readmission_30d': rng.choice([0, 1], n, p=[0.85, 0.15]),
+        'infection_acquired': rng.choice([0, 1], n, p=[0.95, 0.05]),
+    })
+    print(proportion_ci(demo, ['readmission_30d', 'infection_acquired']))
+    print(proportion_ci(demo, ['readmission_30d'], by='unit', method='exact').head())
+
+    t0 = time.perf_counter()
+    cis = bootstrap_ci(demo['length_of_stay'], groups=demo['unit'])
+    print(f"\n{len(cis)} bootstrap CIs in {time.perf_counter() - t0:.2f}s")
+    print(cis.head(6))
@@ -0,0 +1,361 @@
+# ============================================================================
+# LAZY-PLAN VERSION OF THE POLARS TEMPLATE
+# ============================================================================
+# descriptive_analysis_template_polars.py runs dozens of small eager queries
+# (df.select(...).item(), group_by(...).agg(...)) and each of them scans the
+# data again. Here every metric of STEPS 2-7 is written as an expression on
+# one LazyFrame, the queries are handed to pl.collect_all() together, and
+# polars shares the scans and runs the independent aggregates in parallel.
+# With --streaming the same plan runs on the streaming engine, so a CSV or
+# Parquet file larger than RAM can be summarised too.
+#
+# The printed report follows the eager template's, STEP 8 dashboard and the
+# chi-square test included; only the fixed closing text ("POLARS PERFORMANCE
+# FEATURES" list, key takeaways, next steps) is left out. The describe table
+# also gets count / null_count / min / max rows for the string columns, as
+# polars' DataFrame.describe() gives them.
+#
+# Usage:
+#   python descriptive_analysis_lazy_polars.py                          # synthetic data, like the template
+#   python descriptive_analysis_lazy_polars.py --data discharges.parquet --streaming
+#   python descriptive_analysis_lazy_polars.py --figures-dir /tmp/figures
+
+import argparse
+
+import numpy as np
+import polars as pl
+
+from dashboard_plots import dashboard_aggregates, export_dashboard
+from distribution_assessment import DEFAULT_SAMPLE_SIZE, assess_distributions
+from sparse_crosstab import chi_square, sparse_crosstab
+
+CONTINUOUS_VARS = ['age', 'length_of_stay', 'total_charges']
+PERCENTILES = [25, 50, 75, 90, 95]
+## polars cut takes the inner breaks; same groups as pd.cut(bins=[18, 35, 50, 65, 80, 95]) in the pandas template
+AGE_BREAKS = [35, 50, 65, 80]
+AGE_LABELS = ['18-34', '35-49', '50-64', '65-79', '80+']
+## The dashboard's histograms and box plots need these columns row by row (the chi-square test reuses them)
+DASHBOARD_COLUMNS = ['gender', 'age', 'length_of_stay', 'total_charges', 'discharge_disposition']
+
+
+# ============================================================================
+# STEP 1: SAMPLE DATA (identical to the eager template)
+# ============================================================================
+
+def make_template_data(n=1000):
+    """Rebuild the polars template's synthetic dataset with the same seed and draw order."""
+    np.random.seed(42)
+    df = pl.DataFrame({
+        'patient_id': list(range(1, n+1)),
+        'age': np.random.normal(65, 15, n).clip(18, 95).astype(int).tolist(),
+        'gender': np.random.choice(['M', 'F'], n, p=[0.46, 0.54]).tolist(),
+        'length_of_stay': np.random.lognormal(1.2, 0.8, n).clip(1, 30).astype(int).tolist(),
+        'total_charges': np.random.lognormal(9, 1.2, n).clip(1000, 500000).tolist(),
+        'discharge_disposition': np.random.choice(['Home', 'SNF', 'Rehab', 'Transfer', 'Death'],
+                                                  n, p=[0.65, 0.15, 0.10, 0.08, 0.02]).tolist(),
+        'primary_diagnosis': np.random.choice(['Heart Disease', 'Pneumonia', 'Diabetes', 'Stroke', 'Cancer'],
+                                              n, p=[0.25, 0.20, 0.20, 0.15, 0.20]).tolist(),
+        'readmission_30d': np.random.choice([0, 1], n, p=[0.85, 0.15]).tolist(),
+        'surgery_performed': np.random.choice([0, 1], n, p=[0.70, 0.30]).tolist(),
+        'infection_acquired': np.random.choice([0, 1], n, p=[0.95, 0.05]).tolist()
+    })
+    missing_indices = np.random.choice(range(n), size=int(n*0.05), replace=False)
+    return df.with_columns(
+        pl.when(pl.int_range(pl.len()).is_in(missing_indices))
+        .then(None)
+        .otherwise(pl.col('total_charges'))
+        .alias('total_charges')
+    )
+
+
+# ============================================================================
+# THE PLAN - every metric as an expression, nothing executed yet
+# ============================================================================
+
+def build_report_queries(lf, sample_size=DEFAULT_SAMPLE_SIZE, seed=42):
+    """Return {name: LazyFrame} covering every metric printed by the template (STEPS 2-8)."""
+    schema = lf.collect_schema()
+    los = pl.col('length_of_stay')
+    death = pl.col('discharge_disposition') == 'Death'
+
+    # One wide select for every scalar: shape, nulls, describe(), rates, LOS stats, skew/kurtosis
+    scalars = lf.select(
+        pl.len().alias('n_rows'),
+        *[pl.col(c).null_count().alias(f'null__{c}') for c in schema],
+        *[expr for c, dtype in schema.items() for expr in (
+            (
+                pl.col(c).count().alias(f'describe__count__{c}'),
+                pl.col(c).mean().alias(f'describe__mean__{c}'),
+                pl.col(c).std().alias(f'describe__std__{c}'),
+                pl.col(c).min().cast(pl.Float64).alias(f'describe__min__{c}'),
+                pl.col(c).quantile(0.25).alias(f'describe__25%__{c}'),
+                pl.col(c).quantile(0.5).alias(f'describe__50%__{c}'),
+                pl.col(c).quantile(0.75).alias(f'describe__75%__{c}'),
+                pl.col(c).max().cast(pl.Float64).alias(f'describe__max__{c}'),
+            ) if dtype.is_numeric() else (
+                pl.col(c).count().alias(f'describe__count__{c}'),
+                pl.col(c).min().alias(f'describe__min__{c}'),
+                pl.col(c).max().alias(f'describe__max__{c}'),
+            ) if dtype == pl.String else ()
+        )],
+        pl.col('readmission_30d').sum().alias('readmissions'),
+        death.sum().alias('deaths'),
+        pl.col('surgery_performed').sum().alias('surgeries'),
+        pl.col('infection_acquired').sum().alias('infections'),
+        los.mean().alias('los_mean'),
+        los.median().alias('los_median'),
+        los.drop_nulls().mode().sort().first().alias('los_mode'),
+        los.std().alias('los_std'),
+        los.var().alias('los_var'),
+        (los.max() - los.min()).alias('los_range'),
+        (los.quantile(0.75) - los.quantile(0.25)).alias('los_iqr'),
+        *[los.quantile(p / 100).alias(f'los_p{p}') for p in PERCENTILES],
+        los.sum().alias('total_bed_days'),
+        *[pl.col(c).skew().alias(f'skew__{c}') for c in CONTINUOUS_VARS],
+        *[pl.col(c).kurtosis().alias(f'kurtosis__{c}') for c in CONTINUOUS_VARS],
+    )
+
+    return {
+        'scalars': scalars,
+        'gender': lf.group_by('gender').agg(pl.len().alias('count')).sort('gender'),
+        'crosstab': lf.group_by('gender', 'discharge_disposition').agg(pl.len().alias('count')),
+        'age_group': lf.select(pl.col('age').cut(AGE_BREAKS, labels=AGE_LABELS).alias('age_group'))
+                       .group_by('age_group').agg(pl.len().alias('count')).sort('age_group'),
+        'disposition': lf.group_by('discharge_disposition').agg(pl.len().alias('count')),
+        'diagnosis': lf.group_by('primary_diagnosis').agg(pl.len().alias('count')),
+        'over_65': lf.filter(pl.col('age') > 65).group_by('gender').agg(
+            pl.len().alias('count'),
+            los.mean().alias('avg_los'),
+        ),
+        # Random rows for the normality tests (a shuffled row index, so no Python-side sampling)
+        'normality_sample': lf.select('gender', *CONTINUOUS_VARS)
+                              .filter(pl.int_range(pl.len()).shuffle(seed=seed) < sample_size),
+        # The only query that keeps every row - five columns, aggregated in dashboard_aggregates
+        'dashboard': lf.select(DASHBOARD_COLUMNS),
+    }
+
+
+def collect_report(lf, streaming=False, sample_size=DEFAULT_SAMPLE_SIZE):
+    """Execute the whole plan with a single collect_all and return {name: DataFrame}."""
+    queries = build_report_queries(lf, sample_size=sample_size)
+    frames = pl.collect_all(list(queries.values()), engine='streaming' if streaming else 'auto')
+    results = dict(zip(queries, frames))
+    results['scalars'] = results['scalars'].row(0, named=True)
+    return results
+
+
+# ============================================================================
+# PRINTING - same report as the eager template
+# ============================================================================
+
+def _describe_table(scalars):
+    """DataFrame.describe() layout; string columns only have count / null_count / min / max, as strings."""
+    stats_order = ['count', 'null_count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+    columns = [key.split('__', 2)[2] for key in scalars if key.startswith('describe__count__')]
+    text = {c for c in columns if f'describe__mean__{c}' not in scalars}
+    rows = []
+    for stat in stats_order:
+        row = {'statistic': stat}
+        for c in columns:
+            value = scalars[f'null__{c}'] if stat == 'null_count' else scalars.get(f'describe__{stat}__{c}')
+            row[c] = (None if value is None else str(value)) if c in text else \
+                (float(value) if value is not None else None)
+        rows.append(row)
+    return pl.DataFrame(rows)
+
+
+def print_report(results, schema, figures_dir='figures'):
+    s = results['scalars']
+    total = s['n_rows']
+
+    print("=" * 60)
+    print("DATA CLEANING AND OVERVIEW (POLARS)")
+    print("=" * 60)
+    print(f"Dataset shape: {(total, len(schema))}")
+    print(f"Each row represents: Individual patient discharge record")
+    print("\nColumn names and data types:")
+    print(list(schema.values()))
+    print("\nMissing values:")
+    print("Missing Value Summary:")
+    for col in schema:
+        count = s[f'null__{col}']
+        if count > 0:
+            print(f"  {col}: {count} ({count / total * 100:.1f}%)")
+    print("\nBasic descriptive statistics:")
+    print(_describe_table(s))
+
+    print("\n" + "=" * 60)
+    print("FREQUENCY ANALYSIS (POLARS)")
+    print("=" * 60)
+    print("\n1. CATEGORICAL VARIABLES - Frequency Tables")
+    print("\nGender Distribution:")
+    freq_table = results['gender'].with_columns([
+        pl.col('count').alias('Absolute_Frequency'),
+        (pl.col('count') / total).alias('Relative_Frequency'),
+        pl.col('count').cum_sum().alias('Cumulative_Frequency'),
+        (pl.col('count').cum_sum() / total).alias('Relative_Cumulative')
+    ])
+    print(freq_table)
+
+    print("\n2. CROSS-TABULATION (Pivot Tables)")
+    ## pivot is eager-only, but it only ever sees the tiny aggregated table
+    crosstab = results['crosstab'].pivot(on='discharge_disposition', index='gender', values='count') \
+        .sort('gender').fill_null(0)
+    print("\nGender vs Discharge Disposition:")
+    print(crosstab)
+    independence = chi_square(sparse_crosstab(results['dashboard']['gender'],
+                                              results['dashboard']['discharge_disposition']))
+    print(f"\nChi-square: {independence['chi2']:.2f} (df={independence['dof']}, "
+          f"p={independence['p_value']:.4f}), Cramer's V: {independence['cramers_v']:.3f}")
+    print("\nProportions (row percentages):")
+    disposition_cols = [col for col in crosstab.columns if col != 'gender']
+    crosstab_prop = crosstab.with_columns(
+        pl.sum_horizontal(disposition_cols).alias("row_total")
+    ).with_columns([
+        (pl.col(col) / pl.col("row_total")).alias(col) for col in disposition_cols
+    ]).select(['gender'] + disposition_cols)
+    print(crosstab_prop)
+
+    print("\n3. GROUPED FREQUENCY - Age Categories")
+    print(results['age_group'])
+
+    print("\n" + "=" * 60)
+    print("RATIOS, PROPORTIONS, AND RATES (POLARS)")
+    print("=" * 60)
+    print("\n1. RATIOS")
+    gender_dict = dict(results['gender'].iter_rows())
+    female_count = gender_dict.get('F', 0)
+    male_count = gender_dict.get('M', 0)
+    female_to_male_ratio = female_count / male_count if male_count > 0 else 0
+    male_to_female_ratio = male_count / female_count if female_count > 0 else 0
+    print(f"Female discharges: {female_count}")
+    print(f"Male discharges: {male_count}")
+    print(f"Female-to-male ratio: {female_to_male_ratio:.2f}")
+    print(f"Male-to-female ratio: {male_to_female_ratio:.2f}")
+    print(f"Interpretation: For every 1 male discharged, {female_to_male_ratio:.2f} females were discharged")
+
+    print("\n2. PROPORTIONS")
+    female_proportion = female_count / total
+    male_proportion = male_count / total
+    print(f"Proportion of female discharges: {female_proportion:.3f} ({female_proportion*100:.1f}%)")
+    print(f"Proportion of male discharges: {male_proportion:.3f} ({male_proportion*100:.1f}%)")
+
+    print("\n3. RATES")
+    print(f"30-day readmission rate: {s['readmissions'] / total * 100:.1f}%")
+    print(f"In-hospital mortality rate: {s['deaths'] / total * 100:.1f}%")
+    print(f"Surgical procedure rate: {s['surgeries'] / total * 100:.1f}%")
+    print(f"Hospital-acquired infection rate: {s['infections'] / total * 100:.1f}%")
+
+    print("\n" + "=" * 60)
+    print("CENTRAL TENDENCY AND VARIABILITY (POLARS)")
+    print("=" * 60)
+    print("\n1. CENTRAL TENDENCY MEASURES")
+    print(f"Length of Stay (days):")
+    print(f"  Mean: {s['los_mean']:.2f}")
+    print(f"  Median: {s['los_median']:.2f}")
+    print(f"  Mode: {s['los_mode']}")
+    print("\n2. VARIABILITY MEASURES")
+    print(f"  Standard Deviation: {s['los_std']:.2f}")
+    print(f"  Variance: {s['los_var']:.2f}")
+    print(f"  Range: {s['los_range']:.2f}")
+    print(f"  Interquartile Range (IQR): {s['los_iqr']:.2f}")
+    print("\n3. PERCENTILES AND QUARTILES")
+    print("Percentiles for Length of Stay:")
+    for p in PERCENTILES:
+        print(f"  {p}th percentile: {s[f'los_p{p}']:.2f} days")
+
+    print("\n" + "=" * 60)
+    print("DISTRIBUTION ASSESSMENT (POLARS)")
+    print("=" * 60)
+    normality = assess_distributions(results['normality_sample'], CONTINUOUS_VARS,
+                                     strata='gender').set_index('variable')
+    for var in CONTINUOUS_VARS:
+        print(f"\n{var.upper()} DISTRIBUTION:")
+        skewness = s[f'skew__{var}']
+        print(f"  Skewness: {skewness:.3f}")
+        if abs(skewness) < 0.5:
+            skew_interp = "approximately symmetric"
+        elif skewness > 0:
+            skew_interp = "positively skewed (right tail)"
+        else:
+            skew_interp = "negatively skewed (left tail)"
+        print(f"  Interpretation: {skew_interp}")
+        kurtosis = s[f'kurtosis__{var}']
+        print(f"  Kurtosis: {kurtosis:.3f}")
+        if abs(kurtosis) < 0.5:
+            kurt_interp = "mesokurtic (normal-like)"
+        elif kurtosis > 0:
+            kurt_interp = "leptokurtic (peaked, heavy tails)"
+        else:
+            kurt_interp = "platykurtic (flat, light tails)"
+        print(f"  Interpretation: {kurt_interp}")
+        shapiro_p = normality.loc[var, 'shapiro_p']
+        print(f"  Shapiro-Wilk test p-value: {shapiro_p:.6f} (n={normality.loc[var, 'n_sampled']})")
+        print(f"  D'Agostino K^2 p-value: {normality.loc[var, 'dagostino_p']:.6f}")
+        print(f"  Anderson-Darling A^2: {normality.loc[var, 'anderson_stat']:.3f} (5% critical value {normality.loc[var, 'anderson_crit_5pct']:.3f})")
+        normal_interp = "normally distributed" if shapiro_p > 0.05 else "not normally distributed"
+        print(f"  Interpretation: Data is {normal_interp}")
+
+    print("\n" + "=" * 60)
+    print("HEALTHCARE-SPECIFIC METRICS (POLARS)")
+    print("=" * 60)
+    print("\n1. OCCUPANCY AND UTILIZATION METRICS")
+    print(f"  Average Length of Stay (ALOS): {s['los_mean']:.2f} days")
+    available_bed_days = 365 * 100  # Assuming 100 beds available 365 days
+    print(f"  Estimated Bed Occupancy Rate: {s['total_bed_days'] / available_bed_days * 100:.1f}%")
+
+    print("\n2. ADMISSION AND DISCHARGE PATTERNS")
+    print("  Discharge Disposition Distribution:")
+    for row in results['disposition'].sort('count', descending=True).iter_rows(named=True):
+        print(f"    {row['discharge_disposition']}: {row['count']} ({row['count'] / total * 100:.1f}%)")
+
+    print("\n3. QUALITY METRICS")
+    print(f"  30-day Readmission Rate: {s['readmissions'] / total * 100:.1f}%")
+    print(f"  In-hospital Mortality Rate: {s['deaths'] / total * 100:.1f}%")
+    print(f"  Hospital-Acquired Infection Rate: {s['infections'] / total * 100:.1f}%")
+
+    print("\n4. CASE MIX ANALYSIS")
+    print("  Primary Diagnosis Distribution:")
+    for row in results['diagnosis'].sort('count', descending=True).iter_rows(named=True):
+        print(f"    {row['primary_diagnosis']}: {row['count'] / total * 100:.1f}%")
+
+    print("\n" + "=" * 60)
+    print("CREATING VISUALIZATIONS (POLARS DATA)")
+    print("=" * 60)
+    saved_files = export_dashboard(dashboard_aggregates(results['dashboard']), out_dir=figures_dir,
+                                   title='Healthcare Data Descriptive Analysis Dashboard (Polars)')
+    for path in saved_files:
+        print(f"  Saved {path}")
+    print("Visualizations created successfully from Polars data (no pandas copy)!")
+
+    print("\n5. LAZY EVALUATION EXAMPLE:")
+    print("df.lazy().filter(pl.col('age') > 65).group_by('gender').agg([...])")
+    print("\nQuery executed:")
+    print(results['over_65'].sort('gender'))
+
+
+def scan_source(path):
+    """Lazy scan of a CSV or Parquet file - nothing is read until the plan is collected."""
+    if path.endswith('.parquet'):
+        return pl.scan_parquet(path)
+    return pl.scan_csv(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Polars descriptive report built as one lazy plan.')
+    parser.add_argument('--data', help='CSV or Parquet file (default: the template synthetic data)')
+    parser.add_argument('--streaming', action='store_true', help='run the plan on the streaming engine')
+    parser.add_argument('--explain', action='store_true', help='print the optimized plan of the scalar query')
+    parser.add_argument('--figures-dir', default='figures', help='where the STEP 8 dashboard is written')
+    args = parser.parse_args(argv)
+
+    lf = scan_source(args.data) if args.data else make_template_data().lazy()
+    if args.explain:
+        print(build_report_queries(lf)['scalars'].explain())
+
+    results = collect_report(lf, streaming=args.streaming)
+    print_report(results, lf.collect_schema(), figures_dir=args.figures_dir)
+
+
+if __name__ == "__main__":
+    main()
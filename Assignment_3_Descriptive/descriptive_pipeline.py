@@ -0,0 +1,307 @@
+# ============================================================================
+# DESCRIPTIVE REPORT PIPELINE - NAMED STEPS WITH AN ON-DISK CACHE
+# ============================================================================
+# The templates run top to bottom and recompute everything on every run.
+# Here each analysis block is a named step with declared upstream steps.
+# A step's result is pickled under a key built from:
+#   - the fingerprint of the input data
+#   - the step's parameters
+#   - the step's source code, and that of the helper modules it declares in `uses`
+#   - the keys of its upstream steps
+# so changing one step (its code or its parameters) only recomputes that step
+# and the steps downstream of it; everything else is loaded from the cache.
+# Steps that write files (plots) are also recomputed when those files are gone.
+#
+# Usage:
+#   python descriptive_pipeline.py                      # synthetic data, like the templates
+#   python descriptive_pipeline.py --data discharges.csv
+#   python descriptive_pipeline.py --set distribution.sample_size=2000
+#   python descriptive_pipeline.py --out-dir Assignment_3_Descriptive   # CSVs, figures/ and cache there
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+from graphlib import TopologicalSorter
+
+import numpy as np
+import pandas as pd
+
+from distribution_assessment import assess_distributions
+from dashboard_plots import dashboard_aggregates, export_dashboard
+
+## instrumentation.py (stage timers, off unless enabled) lives at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from instrumentation import stage  # noqa: E402
+
+DEFAULT_CACHE_DIR = '.cache/descriptive'
+
+## Registry of steps: name -> {'func', 'depends_on', 'uses', 'writes_files', 'params'}
+STEPS = {}
+
+
+def step(name, depends_on=(), uses=(), writes_files=False, **default_params):
+    """Register a function as a pipeline step. It is called as func(df, params, **upstream_results).
+
+    uses: helper functions the step calls; the source of their modules is part of the cache key.
+    writes_files: the step returns the paths it wrote, and is only a cache hit while they all exist.
+    """
+    def register(func):
+        STEPS[name] = {'func': func, 'depends_on': tuple(depends_on), 'uses': tuple(uses),
+                       'writes_files': writes_files, 'params': default_params}
+        return func
+    return register
+
+
+# ============================================================================
+# FINGERPRINTS AND CACHE KEYS
+# ============================================================================
+
+def data_fingerprint(df):
+    """Content hash of a pandas or polars DataFrame (values, column names and dtypes)."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[c, str(t)] for c, t in zip(df.columns, df.dtypes)]).encode())
+    if isinstance(df, pd.DataFrame):
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    else:
+        row_hashes = df.hash_rows(seed=0).to_numpy()
+    digest.update(np.ascontiguousarray(row_hashes).tobytes())
+    return digest.hexdigest()
+
+
+def _step_key(name, params, data_fp, upstream_keys):
+    spec = STEPS[name]
+    source = inspect.getsource(spec['func'])
+    ## Whole modules, so edits to the private helpers they call also change the key
+    modules = {inspect.getmodule(helper) for helper in spec['uses']}
+    for module in sorted(modules, key=lambda module: module.__name__):
+        source += inspect.getsource(module)
+    payload = {
+        'step': name,
+        'params': params,
+        'data': data_fp,
+        'code': hashlib.sha256(source.encode()).hexdigest(),
+        'upstream': upstream_keys,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _required_steps(targets):
+    """The targets plus every step they depend on, directly or indirectly."""
+    needed, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in needed:
+            needed.add(name)
+            stack.extend(STEPS[name]['depends_on'])
+    return needed
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def run_pipeline(df, params=None, targets=None, cache_dir=DEFAULT_CACHE_DIR, force=False, verbose=True):
+    """Run the steps needed for `targets` (default: all) and return {step name: result}.
+
+    `params` overrides step parameters, e.g. {'distribution': {'sample_size': 2000}}.
+    Steps whose cache key is unchanged are loaded from `cache_dir` instead of recomputed.
+    """
+    params = params or {}
+    needed = _required_steps(targets or list(STEPS))
+    graph = {name: STEPS[name]['depends_on'] for name in needed}
+    os.makedirs(cache_dir, exist_ok=True)
+
+    data_fp = data_fingerprint(df)
+    keys, results = {}, {}
+    for name in TopologicalSorter(graph).static_order():
+        spec = STEPS[name]
+        step_params = {**spec['params'], **params.get(name, {})}
+        keys[name] = _step_key(name, step_params, data_fp, [keys[d] for d in spec['depends_on']])
+        path = os.path.join(cache_dir, f"{name}-{keys[name]}.pkl")
+
+        with stage(name, category='step', rows_in=len(df)) as record:
+            cached = None
+            if os.path.exists(path) and not force:
+                with open(path, 'rb') as f:
+                    cached = pickle.load(f)
+                if spec['writes_files'] and not all(os.path.exists(output) for output in cached):
+                    cached = None
+            if cached is not None:
+                results[name] = cached
+                status = 'cached'
+            else:
+                upstream = {d: results[d] for d in spec['depends_on']}
+                results[name] = spec['func'](df, step_params, **upstream)
+                with open(path, 'wb') as f:
+                    pickle.dump(results[name], f, protocol=pickle.HIGHEST_PROTOCOL)
+                status = 'computed'
+            record.info['status'] = status
+        if verbose:
+            print(f"  [{status:>8}] {name} ({keys[name]})")
+    return results
+
+
+# ============================================================================
+# STEPS (same analyses as the pandas template)
+# ============================================================================
+
+@step('frequencies', age_bins=[18, 35, 50, 65, 80, 95], age_labels=['18-34', '35-49', '50-64', '65-79', '80+'])
+def frequencies(df, params):
+    gender_freq = df['gender'].value_counts().sort_index()
+    gender_rel_freq = df['gender'].value_counts(normalize=True).sort_index()
+    freq_table = pd.DataFrame({
+        'Absolute_Frequency': gender_freq,
+        'Relative_Frequency': gender_rel_freq,
+        'Cumulative_Frequency': gender_freq.cumsum(),
+        'Relative_Cumulative': gender_rel_freq.cumsum()
+    })
+    age_group = pd.cut(df['age'], bins=params['age_bins'], labels=params['age_labels'])
+    return {
+        'gender': freq_table,
+        'age_group': age_group.value_counts().sort_index(),
+        'describe': df.describe(),
+    }
+
+
+@step('crosstabs', row='gender', column='discharge_disposition')
+def crosstabs(df, params):
+    return {
+        'counts': pd.crosstab(df[params['row']], df[params['column']], margins=True),
+        'row_proportions': pd.crosstab(df[params['row']], df[params['column']], normalize='index'),
+    }
+
+
+@step('rates', depends_on=['frequencies'],
+      flags=['readmission_30d', 'surgery_performed', 'infection_acquired'], death_label='Death')
+def rates(df, params, frequencies):
+    counts = frequencies['gender']['Absolute_Frequency']
+    female, male = counts.get('F', 0), counts.get('M', 0)
+    total = len(df)
+    result = {
+        'female_to_male_ratio': female / male if male else np.nan,
+        'male_to_female_ratio': male / female if female else np.nan,
+        'female_proportion': female / total,
+        'male_proportion': male / total,
+        'mortality_rate': (df['discharge_disposition'] == params['death_label']).sum() / total * 100,
+    }
+    for flag in params['flags']:
+        result[f'{flag}_rate'] = df[flag].sum() / total * 100
+    return result
+
+
+@step('central_tendency', column='length_of_stay', percentiles=[25, 50, 75, 90, 95])
+def central_tendency(df, params):
+    data = df[params['column']].dropna()
+    mode = data.mode()
+    return {
+        'mean': data.mean(),
+        'median': data.median(),
+        'mode': mode.iloc[0] if not mode.empty else np.nan,
+        'std': data.std(),
+        'var': data.var(),
+        'range': data.max() - data.min(),
+        'iqr': data.quantile(0.75) - data.quantile(0.25),
+        'percentiles': data.quantile([p / 100 for p in params['percentiles']]),
+    }
+
+
+@step('distribution', uses=[assess_distributions], columns=['age', 'length_of_stay', 'total_charges'], strata='gender', sample_size=5000)
+def distribution(df, params):
+    return assess_distributions(df, params['columns'], sample_size=params['sample_size'], strata=params['strata'])
+
+
+@step('plots', uses=[dashboard_aggregates, export_dashboard], writes_files=True, out_dir='figures', formats=['png', 'svg'])
+def plots(df, params):
+    return export_dashboard(dashboard_aggregates(df), out_dir=params['out_dir'], formats=params['formats'])
+
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
+
+def sample_columns(n=1000, seed=42):
+    """Synthetic discharge records shaped like the templates' STEP 1 data, as a dict of numpy arrays."""
+    rng = np.random.default_rng(seed)
+    columns = {
+        'patient_id': np.arange(1, n + 1),
+        'age': rng.normal(65, 15, n).clip(18, 95).astype(int),
+        'gender': rng.choice(['M', 'F'], n, p=[0.46, 0.54]),
+        'length_of_stay': rng.lognormal(1.2, 0.8, n).clip(1, 30).astype(int),
+        'total_charges': rng.lognormal(9, 1.2, n).clip(1000, 500000),
+        'discharge_disposition': rng.choice(['Home', 'SNF', 'Rehab', 'Transfer', 'Death'],
+                                            n, p=[0.65, 0.15, 0.10, 0.08, 0.02]),
+        'primary_diagnosis': rng.choice(['Heart Disease', 'Pneumonia', 'Diabetes', 'Stroke', 'Cancer'],
+                                        n, p=[0.25, 0.20, 0.20, 0.15, 0.20]),
+        'readmission_30d': rng.choice([0, 1], n, p=[0.85, 0.15]),
+        'surgery_performed': rng.choice([0, 1], n, p=[0.70, 0.30]),
+        'infection_acquired': rng.choice([0, 1], n, p=[0.95, 0.05]),
+    }
+    columns['total_charges'][rng.choice(n, size=int(n * 0.05), replace=False)] = np.nan
+    return columns
+
+
+def make_sample_data(n=1000, seed=42):
+    """Synthetic discharge records as a pandas DataFrame."""
+    return pd.DataFrame(sample_columns(n, seed))
+
+
+def _parse_overrides(pairs):
+    """Turn ['distribution.sample_size=2000', ...] into {'distribution': {'sample_size': 2000}}.
+
+    Raises ValueError for a malformed pair or an unknown step / parameter name.
+    """
+    params = {}
+    for pair in pairs:
+        target, sep, value = pair.partition('=')
+        step_name, dot, key = target.partition('.')
+        if not (sep and dot and step_name and key):
+            raise ValueError(f"--set {pair!r}: expected STEP.PARAM=VALUE")
+        if step_name not in STEPS:
+            raise ValueError(f"--set {pair!r}: unknown step {step_name!r} (steps: {', '.join(sorted(STEPS))})")
+        if key not in STEPS[step_name]['params']:
+            raise ValueError(f"--set {pair!r}: step {step_name!r} has no parameter {key!r} "
+                             f"(parameters: {', '.join(sorted(STEPS[step_name]['params']))})")
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            pass  # plain strings don't need quoting on the command line
+        params.setdefault(step_name, {})[key] = value
+    return params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the descriptive report as a cached DAG of steps.')
+    parser.add_argument('--data', help='CSV of discharge records (default: synthetic sample data)')
+    parser.add_argument('--steps', nargs='+', choices=sorted(STEPS), help='only run these steps (and their inputs)')
+    parser.add_argument('--set', dest='overrides', action='append', default=[], metavar='STEP.PARAM=VALUE',
+                        help='override a step parameter; VALUE is parsed as JSON when possible')
+    parser.add_argument('--out-dir', default='.',
+                        help='where the CSVs, figures/ and the default cache go (default: current directory)')
+    parser.add_argument('--cache-dir', help=f'step cache (default: <out-dir>/{DEFAULT_CACHE_DIR})')
+    parser.add_argument('--force', action='store_true', help='ignore the cache and recompute every step')
+    args = parser.parse_args(argv)
+    try:
+        params = _parse_overrides(args.overrides)
+    except ValueError as error:
+        parser.error(str(error))
+    params.setdefault('plots', {}).setdefault('out_dir', os.path.normpath(os.path.join(args.out_dir, 'figures')))
+    cache_dir = args.cache_dir or os.path.normpath(os.path.join(args.out_dir, DEFAULT_CACHE_DIR))
+
+    df = pd.read_csv(args.data) if args.data else make_sample_data()
+    print(f"Running descriptive pipeline on {len(df)} records")
+    results = run_pipeline(df, params=params, targets=args.steps,
+                           cache_dir=cache_dir, force=args.force)
+
+    # Same output files as the pandas template
+    if 'frequencies' in results:
+        results['frequencies']['gender'].to_csv(os.path.join(args.out_dir, 'gender_distribution.csv'))
+        results['frequencies']['describe'].to_csv(os.path.join(args.out_dir, 'descriptive_describe.csv'))
+    return results
+
+
+if __name__ == "__main__":
+    main()
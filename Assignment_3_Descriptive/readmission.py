@@ -0,0 +1,108 @@
+# ============================================================================
+# N-DAY READMISSIONS FROM VISIT-LEVEL DATA
+# ============================================================================
+# In the templates readmission_30d is a random 0/1 flag. With real visit
+# records the flag has to be derived: an index admission is readmitted when
+# the same patient is admitted again within N days of its discharge.
+#
+# The data is sorted once by (patient, admit date); every visit then only
+# needs the *next* qualifying admission of the same patient, which is a shift
+# plus a backward fill inside each patient - no self-join, so the cost is the
+# sort plus a few linear passes and scales to 100M+ encounters (and runs
+# unchanged on a LazyFrame / the streaming engine).
+#
+# Exclusion rules (ICD-10 prefixes, dotted or not):
+#   exclude_index_dx   - visits that can't be an index admission (e.g. planned chemo Z51.1)
+#   exclude_readmit_dx - admissions that don't count as readmissions (planned care);
+#                        the next *unplanned* admission is used instead
+#   exclude_dispositions - index stays ending this way aren't eligible (e.g. 'Death')
+
+import polars as pl
+
+
+def _dx_matches(dx_col, prefixes):
+    """True where the (undotted) diagnosis starts with any of the prefixes."""
+    if not prefixes:
+        return pl.lit(False)
+    code = pl.col(dx_col).str.replace_all('.', '', literal=True).str.to_uppercase()
+    return pl.any_horizontal([code.str.starts_with(p.replace('.', '').upper()) for p in prefixes]).fill_null(False)
+
+
+def flag_readmissions(visits, patient_col='patient_id', admit_col='admit_date', discharge_col='discharge_date',
+                      dx_col=None, disposition_col=None, window_days=30, exclude_index_dx=(),
+                      exclude_readmit_dx=(), exclude_dispositions=('Death',)):
+    """Add days_to_readmit, index_eligible and readmit_<N>d columns to a polars DataFrame/LazyFrame.
+
+    readmit_<N>d is null for visits that aren't eligible index admissions, so
+    mean() over it is directly the readmission rate.
+    """
+    is_lazy = isinstance(visits, pl.LazyFrame)
+    same_patient_next = pl.col(patient_col).shift(-1) == pl.col(patient_col)
+
+    # Admission date of this visit if it may count as a readmission, else null
+    countable = pl.lit(True) if dx_col is None else ~_dx_matches(dx_col, exclude_readmit_dx)
+    countable_admit = pl.when(countable).then(pl.col(admit_col)).alias('_countable_admit')
+
+    eligible = pl.col(discharge_col).is_not_null()
+    if dx_col is not None:
+        eligible = eligible & ~_dx_matches(dx_col, exclude_index_dx)
+    if disposition_col is not None and exclude_dispositions:
+        eligible = eligible & ~pl.col(disposition_col).is_in(list(exclude_dispositions)).fill_null(False)
+
+    flag = f'readmit_{window_days}d'
+    result = visits.lazy() \
+        .sort(patient_col, admit_col) \
+        .with_columns(countable_admit, pl.col(patient_col).alias('_patient')) \
+        .with_columns(
+            # first countable admission after this visit, within the same patient
+            pl.when(same_patient_next).then(pl.col('_countable_admit').shift(-1))
+            .otherwise(None).alias('_next_admit')
+        ) \
+        .with_columns(pl.col('_next_admit').fill_null(strategy='backward').over('_patient')) \
+        .with_columns(
+            (pl.col('_next_admit').cast(pl.Date) - pl.col(discharge_col).cast(pl.Date)).dt.total_days()
+            .alias('days_to_readmit'),
+            eligible.alias('index_eligible'),
+        ) \
+        .with_columns(
+            pl.when(pl.col('index_eligible'))
+            .then(pl.col('days_to_readmit').is_between(0, window_days).fill_null(False))
+            .otherwise(None).alias(flag)
+        ) \
+        .drop('_countable_admit', '_next_admit', '_patient')
+    return result if is_lazy else result.collect()
+
+
+def readmission_rates(flagged, window_days=30, by=None):
+    """Eligible index admissions, readmissions and the rate (%), overall or per `by` column(s)."""
+    flag = f'readmit_{window_days}d'
+    aggs = [
+        pl.col(flag).count().alias('index_admissions'),
+        pl.col(flag).sum().alias('readmissions'),
+        (pl.col(flag).mean() * 100).alias('readmission_rate'),
+    ]
+    frame = flagged.lazy()
+    result = frame.group_by(by).agg(aggs).sort(by) if by else frame.select(aggs)
+    return result.collect()
+
+
+if __name__ == "__main__":
+    # Demo on synthetic encounters: ~5 visits per patient spread over two years
+    import numpy as np
+
+    n_visits, n_patients = 1_000_000, 200_000
+    rng = np.random.default_rng(42)
+    admit = np.datetime64('2023-01-01') + rng.integers(0, 730, n_visits).astype('timedelta64[D]')
+    visits = pl.DataFrame({
+        'patient_id': rng.integers(1, n_patients + 1, n_visits),
+        'admit_date': admit,
+        'discharge_date': admit + rng.lognormal(1.2, 0.8, n_visits).clip(0, 30).astype(int).astype('timedelta64[D]'),
+        'primary_icd10': rng.choice(['I50.9', 'J18.9', 'E11.9', 'Z51.11', 'N18.3'], n_visits),
+        'discharge_disposition': rng.choice(['Home', 'SNF', 'Death'], n_visits, p=[0.8, 0.18, 0.02]),
+    })
+
+    flagged = flag_readmissions(visits, dx_col='primary_icd10', disposition_col='discharge_disposition',
+                                exclude_index_dx=['Z51.1'], exclude_readmit_dx=['Z51.1'])
+    print(flagged.head())
+    print(readmission_rates(flagged))
+    print(readmission_rates(flagged, by='primary_icd10'))
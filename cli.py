@@ -0,0 +1,245 @@
+# ============================================================================
+# ONE COMMAND LINE FOR THE CODEX, PATIENTS AND DESCRIPTIVE SCRIPTS
+# ============================================================================
+# Run from the repository root (all default paths are relative to it):
+#   python cli.py codex build                  # ICD-10 code set, hierarchy, NPI search index, XML tables
+#   python cli.py codex lookup E11.9 F41.9     # ICD-10 codes -> description / billable
+#   python cli.py codex lookup --name Smith John   # NPI providers by (fuzzy) name
+#   python cli.py patients load                # compact patients table (rebuilt when the CSV changes)
+#   python cli.py describe run --force         # descriptive pipeline; options as descriptive_pipeline.py
+#   python cli.py --profile trace.json describe run   # any command under instrumentation.py
+#
+# Start-up time: this module imports only the standard library. pandas,
+# polars, numpy and scipy are imported inside the command that needs them,
+# so `codex lookup --help` or a code lookup never pays for them - a lookup is
+# a binary search straight on the sorted code-set CSV.
+# tests/test_cli_startup.py keeps it that way (no heavy imports, ~150 ms budget).
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CODEX_DIR = os.path.join(ROOT, 'Assignment_1', 'medical-codex-pipeline')
+SCRIPT_DIRS = {
+    'icd10': os.path.join(CODEX_DIR, 'scripts', 'icd10'),
+    'npi': os.path.join(CODEX_DIR, 'scripts', 'npi'),
+    'patients': os.path.join(ROOT, 'Assignment_2_DBS'),
+    'describe': os.path.join(ROOT, 'Assignment_3_Descriptive'),
+}
+
+## Same locations as icd10_validator.code_set_output_path / npi_search_index.search_index_output_path
+CODE_SET_PATH = 'Assignment_1/medical-codex-pipeline/outputs/icd10cm_small.csv'
+NPI_INDEX_PATH = 'Assignment_1/medical-codex-pipeline/Outputs/npi_search_index.parquet'
+
+
+def _use_scripts(*names):
+    """Put script folders on sys.path - only called by the commands that import from them."""
+    for name in names:
+        if SCRIPT_DIRS[name] not in sys.path:
+            sys.path.insert(0, SCRIPT_DIRS[name])
+
+
+# ============================================================================
+# codex lookup: binary search on the sorted CSV, standard library only
+# ============================================================================
+
+def _normalize_code(code):
+    return code.strip().upper().replace('.', '').replace(' ', '')
+
+
+def _dotted(code):
+    return code if len(code) <= 3 else f"{code[:3]}.{code[3:]}"
+
+
+def find_code(path, code):
+    """Row of the code-set CSV for `code` (undotted), or None. O(log n) seeks, nothing is loaded.
+
+    The file is sorted by code (compile_code_set writes it that way), so each
+    probe seeks to the middle of the remaining byte range, skips to the next
+    line start and compares that line's code.
+    """
+    import csv
+
+    key = code.encode()
+    with open(path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode()]))
+        lo, hi = f.tell(), os.fstat(f.fileno()).st_size
+        ## Invariant: the matching line, if any, starts at or after lo and before hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mid > lo:
+                ## Finish the line we landed in; starting one byte early keeps a line that begins at mid
+                f.seek(mid - 1)
+                f.readline()
+            else:
+                f.seek(mid)
+            line_start = f.tell()
+            line = f.readline()
+            if not line or line_start >= hi:
+                hi = mid
+                continue
+            line_code = line.split(b',', 1)[0].strip(b'"')
+            if line_code == key:
+                return dict(zip(header, next(csv.reader([line.decode()]))))
+            if line_code < key:
+                lo = f.tell()
+            else:
+                hi = mid
+    return None
+
+
+def codex_lookup(args):
+    if args.name:
+        return npi_lookup(args)
+    if not os.path.exists(args.code_set):
+        sys.exit(f"{args.code_set} not found - run `python cli.py codex build` first")
+    status = 0
+    for raw in args.codes:
+        row = find_code(args.code_set, _normalize_code(raw))
+        if row is None:
+            print(f"{raw}\tnot found")
+            status = 1
+        else:
+            kind = 'billable' if row.get('is_billable', '').lower() == 'true' else 'header'
+            print(f"{_dotted(row['code'])}\t{kind}\t{row.get('description', '')}")
+    return status
+
+
+def npi_lookup(args):
+    if not os.path.exists(args.npi_index):
+        sys.exit(f"{args.npi_index} not found - run `python cli.py codex build` first")
+    _use_scripts('npi')
+    from npi_search_index import load_search_index, search_provider
+
+    last, first = args.name[0], ' '.join(args.name[1:])
+    print(search_provider(load_search_index(args.npi_index), last, first, top_k=args.top))
+    return 0
+
+
+# ============================================================================
+# Heavier commands (import on demand)
+# ============================================================================
+
+def codex_build(args):
+    targets = args.only or ['icd10', 'hierarchy', 'npi', 'xml']
+    if {'icd10', 'hierarchy', 'xml'} & set(targets):
+        _use_scripts('icd10')
+    if 'icd10' in targets:
+        from icd10_validator import compile_code_set
+        compile_code_set()
+    if 'hierarchy' in targets:
+        from icd10_hierarchy import compile_hierarchy
+        compile_hierarchy()
+    if 'npi' in targets:
+        _use_scripts('npi')
+        from npi_search_index import compile_search_index, npi_file_path
+        if os.path.exists(npi_file_path):
+            compile_search_index()
+        else:
+            print(f"Skipping NPI search index: {npi_file_path} not found")
+    if 'xml' in targets:
+        from icd10_xml_ingest import ingest_all
+        try:
+            ingest_all(input_dirs=args.input_dir, n_jobs=args.jobs, strict=args.strict)
+        except FileNotFoundError as error:
+            print(f"Skipping XML tables: {error}")
+    return 0
+
+
+def patients_load(args):
+    _use_scripts('patients')
+    from patients_compact import load_patients
+
+    compact, meta = load_patients(args.csv, args.compact)
+    print(f"Loaded {len(compact):,} patients ({compact.memory_usage(deep=True).sum() / 1024 ** 2:.2f} MB)")
+    print(compact.dtypes.to_string())
+    print(compact.head(args.head).to_string())
+    return 0
+
+
+def describe_run(args):
+    _use_scripts('describe')
+    from descriptive_pipeline import main as pipeline_main
+
+    ## Outputs go next to the committed CSVs in Assignment_3_Descriptive/; a later --out-dir wins
+    pipeline_main(['--out-dir', SCRIPT_DIRS['describe']] + args.pipeline_args)
+    return 0
+
+
+# ============================================================================
+# Argument parsing
+# ============================================================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python cli.py',
+                                     description='Medical codex, patients and descriptive analysis commands.')
+    parser.add_argument('--profile', metavar='TRACE_JSON',
+                        help='run the command under instrumentation.py and write a Chrome trace '
+                             '(stage records go to <name>.stages.json)')
+    groups = parser.add_subparsers(dest='group', required=True)
+
+    codex = groups.add_parser('codex', help='medical code sets').add_subparsers(dest='command', required=True)
+    build = codex.add_parser('build', help='compile the ICD-10 code set, hierarchy, NPI search index and XML tables')
+    build.add_argument('--only', nargs='+', choices=['icd10', 'hierarchy', 'npi', 'xml'])
+    build.add_argument('--input-dir', nargs='+', metavar='DIR',
+                       help='directories to search for the XML files (default: input/, then the XSD folder)')
+    build.add_argument('--jobs', type=int, help='worker processes for the XML files (default: one per CPU)')
+    build.add_argument('--strict', action='store_true', help='fail the XML build on any XSD violation')
+    build.set_defaults(handler=codex_build)
+
+    lookup = codex.add_parser('lookup', help='look up ICD-10 codes, or NPI providers with --name')
+    lookup.add_argument('codes', nargs='*', metavar='CODE', help="ICD-10-CM codes, dotted or not ('E11.9', 'e119')")
+    lookup.add_argument('--name', nargs='+', metavar=('LAST', 'FIRST'), help='search NPI providers by name')
+    lookup.add_argument('--top', type=int, default=10, help='matches to show for --name')
+    lookup.add_argument('--code-set', default=CODE_SET_PATH)
+    lookup.add_argument('--npi-index', default=NPI_INDEX_PATH)
+    lookup.set_defaults(handler=codex_lookup)
+
+    patients = groups.add_parser('patients', help='patients table').add_subparsers(dest='command', required=True)
+    load = patients.add_parser('load', help='load the compact patients table (rebuilt from the CSV when stale)')
+    load.add_argument('--csv', default='Assignment_2_DBS/patients.csv')
+    load.add_argument('--compact', default='Assignment_2_DBS/patients_compact.npz')
+    load.add_argument('--head', type=int, default=5)
+    load.set_defaults(handler=patients_load)
+
+    describe = groups.add_parser('describe', help='descriptive analysis').add_subparsers(dest='command',
+                                                                                         required=True)
+    run = describe.add_parser('run', help='run the cached descriptive pipeline', add_help=False,
+                              description='Remaining arguments go to descriptive_pipeline.py (try --help).')
+    run.add_argument('pipeline_args', nargs=argparse.REMAINDER)
+    run.set_defaults(handler=describe_run)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    ## `describe run` passes its options through; argparse only hands over unknown options this way
+    args, extra = parser.parse_known_args(argv)
+    if args.handler is describe_run:
+        args.pipeline_args = extra + args.pipeline_args
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.group == 'codex' and args.command == 'lookup' and not (args.codes or args.name):
+        parser.parse_args(['codex', 'lookup', '--help'])
+
+    if not args.profile:
+        return args.handler(args)
+
+    import instrumentation
+
+    profiler = instrumentation.enable()
+    instrumentation.instrument_io()
+    try:
+        with instrumentation.stage(f"{args.group} {args.command}", category='command'):
+            return args.handler(args)
+    finally:
+        instrumentation.disable()
+        root, _ = os.path.splitext(args.profile)
+        profiler.write_chrome_trace(args.profile)
+        profiler.write_json(f"{root}.stages.json")
+        profiler.print_summary()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
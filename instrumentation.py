@@ -0,0 +1,457 @@
+# ============================================================================
+# PIPELINE INSTRUMENTATION - STAGE TIMERS, MEMORY AND ROW COUNTS
+# ============================================================================
+# Shared by the codex processors, the SQLite loaders and the descriptive
+# scripts. A *stage* is a timed block of work; for each one we record
+#   - wall time (start offset and duration)
+#   - resident memory at start / end and the peak in between (polars and
+#     numpy allocate outside Python, so RSS is what matters)
+#   - optionally the peak of Python allocations (tracemalloc)
+#   - rows in and rows out (and the in-memory size of the output frame)
+# Stages nest; the results export as JSON and as a Chrome trace
+# (chrome://tracing or https://ui.perfetto.dev).
+#
+# Instrumentation is off unless enabled, and then stage() costs one
+# attribute check, so markers can stay in hot code.
+#
+# In code:
+#   from instrumentation import stage, timed
+#   with stage('load patients') as s:
+#       df = pd.read_csv(path)
+#       s.rows_out = len(df)
+#   @timed('normalize codes')            # rows in / out taken from the frames
+#   def normalize(df): ...
+#
+# Any script, without editing it:
+#   python instrumentation.py --trace trace.json Assignment_2_DBS/sqlite_pandas_queries.py
+#   python instrumentation.py --json stages.json --io --allocations --cprofile run.prof \
+#       --stage distribution_assessment.assess_distributions \
+#       Assignment_3_Descriptive/descriptive_pipeline.py --force
+#   PIPELINE_PROFILE=trace.json python some_script.py   # for scripts that import this module
+# (--stage wraps a function of an imported module; the script's own functions
+# can't be patched from outside, that's what stage() / @timed are for)
+
+import argparse
+import atexit
+import cProfile
+import functools
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import runpy
+import sys
+import threading
+import time
+import tracemalloc
+
+## Process-wide profiler; None means instrumentation is off
+_active = None
+
+
+# ============================================================================
+# MEASUREMENT HELPERS
+# ============================================================================
+
+def current_rss():
+    """Resident set size in bytes (Linux /proc; falls back to the peak from getrusage elsewhere)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        scale = 1 if platform.system() == 'Darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def frame_stats(obj):
+    """(rows, bytes) of a pandas / polars DataFrame or Series (or the first one in a tuple); (None, None) otherwise."""
+    if isinstance(obj, (tuple, list)):
+        for item in obj:
+            rows, size = frame_stats(item)
+            if rows is not None:
+                return rows, size
+        return None, None
+    if hasattr(obj, 'estimated_size'):  # polars
+        return len(obj), obj.estimated_size()
+    if hasattr(obj, 'memory_usage') and hasattr(obj, 'index'):  # pandas
+        usage = obj.memory_usage(deep=True)
+        return len(obj), int(usage.sum() if hasattr(usage, 'sum') else usage)
+    return None, None
+
+
+class _RssSampler:
+    """Background thread polling RSS, so each stage can report the peak reached inside it."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def reset(self):
+        """Start a new peak window; returns the peak of the window that just ended."""
+        peak, self.peak = max(self.peak, current_rss()), current_rss()
+        return peak
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+# ============================================================================
+# STAGES AND THE PROFILER
+# ============================================================================
+
+class Stage:
+    """One timed block. Set rows_in / rows_out (or extra fields in `info`) while it runs."""
+
+    __slots__ = ('name', 'category', 'depth', 'rows_in', 'rows_out', 'bytes_out', 'info', 'start', 'duration',
+                 'rss_start', 'rss_end', 'rss_peak', 'alloc_peak', '_running_rss_peak', '_running_alloc_peak')
+
+    def __init__(self, name, category, depth, rows_in=None):
+        self.name, self.category, self.depth = name, category, depth
+        self.rows_in, self.rows_out, self.bytes_out = rows_in, None, None
+        self.info = {}
+        self.start = self.duration = None
+        self.rss_start = self.rss_end = self.rss_peak = self.alloc_peak = None
+        self._running_rss_peak = self._running_alloc_peak = 0
+
+    def as_dict(self):
+        mb = 1024 ** 2
+        record = {
+            'name': self.name, 'category': self.category, 'depth': self.depth,
+            'start_s': round(self.start, 6), 'duration_s': round(self.duration, 6),
+            'rows_in': self.rows_in, 'rows_out': self.rows_out,
+            'mb_out': None if self.bytes_out is None else round(self.bytes_out / mb, 3),
+            'rss_start_mb': round(self.rss_start / mb, 1), 'rss_end_mb': round(self.rss_end / mb, 1),
+            'rss_peak_mb': round(self.rss_peak / mb, 1),
+            'alloc_peak_mb': None if self.alloc_peak is None else round(self.alloc_peak / mb, 3),
+        }
+        record.update(self.info)
+        return record
+
+
+class _NullStage:
+    """Returned by stage() when instrumentation is off - accepts and ignores everything."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+    @property
+    def info(self):
+        return {}
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Profiler:
+    """Collects Stage records for the process. Use enable() rather than creating one directly."""
+
+    def __init__(self, allocations=False, cprofile_path=None, sample_interval=0.005):
+        self.stages = []
+        self._stack = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self.allocations = allocations
+        if allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._sampler = _RssSampler(sample_interval)
+        self.cprofile_path = cprofile_path
+        self._cprofile = cProfile.Profile() if cprofile_path else None
+        if self._cprofile:
+            self._cprofile.enable()
+
+    # -- stage bookkeeping: peaks are windows that restart at every stage boundary, and a
+    # -- window's peak is folded into every stage still open, so nesting stays correct
+    def _close_window(self):
+        rss_peak = self._sampler.reset()
+        alloc_peak = 0
+        if self.allocations:
+            alloc_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        for open_stage in self._stack:
+            open_stage._running_rss_peak = max(open_stage._running_rss_peak, rss_peak)
+            open_stage._running_alloc_peak = max(open_stage._running_alloc_peak, alloc_peak)
+
+    def _enter(self, record):
+        with self._lock:
+            self._close_window()
+            record.rss_start = current_rss()
+            record._running_rss_peak = record.rss_start
+            if self.allocations:
+                record._running_alloc_peak = tracemalloc.get_traced_memory()[0]
+            record.start = time.perf_counter() - self._origin
+            self._stack.append(record)
+
+    def _exit(self, record):
+        with self._lock:
+            record.duration = time.perf_counter() - self._origin - record.start
+            self._close_window()
+            self._stack.remove(record)
+            record.rss_end = current_rss()
+            record.rss_peak = record._running_rss_peak
+            if self.allocations:
+                record.alloc_peak = record._running_alloc_peak
+            self.stages.append(record)
+
+    def stop(self):
+        if self._cprofile:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+            print(f"cProfile stats saved to {self.cprofile_path}", file=sys.stderr)
+            self._cprofile = None
+        self._sampler.stop()
+
+    # -- exports
+    def records(self):
+        return [record.as_dict() for record in sorted(self.stages, key=lambda r: r.start)]
+
+    def summary(self):
+        """Total time, calls and rows per stage name, slowest first."""
+        totals = {}
+        for record in self.stages:
+            entry = totals.setdefault(record.name, {'name': record.name, 'calls': 0, 'total_s': 0.0,
+                                                    'rows_out': 0, 'rss_peak_mb': 0.0})
+            entry['calls'] += 1
+            entry['total_s'] += record.duration
+            entry['rows_out'] += record.rows_out or 0
+            entry['rss_peak_mb'] = max(entry['rss_peak_mb'], round(record.rss_peak / 1024 ** 2, 1))
+        return sorted(totals.values(), key=lambda entry: -entry['total_s'])
+
+    def write_json(self, path):
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'argv': sys.argv,
+            'peak_rss_mb': round(max([r.rss_peak for r in self.stages], default=current_rss()) / 1024 ** 2, 1),
+            'summary': self.summary(),
+            'stages': self.records(),
+        }
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Stage timings saved to {path}", file=sys.stderr)
+
+    def write_chrome_trace(self, path):
+        """Chrome trace event format: one complete ('X') event per stage plus an RSS counter track."""
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': ' '.join(sys.argv)}}]
+        for record in sorted(self.stages, key=lambda r: r.start):
+            fields = record.as_dict()
+            args = {k: v for k, v in fields.items()
+                    if k not in ('name', 'category', 'depth', 'start_s', 'duration_s') and v is not None}
+            events.append({'name': record.name, 'cat': record.category, 'ph': 'X', 'pid': pid, 'tid': 0,
+                           'ts': record.start * 1e6, 'dur': record.duration * 1e6, 'args': args})
+            for ts, rss in ((record.start, record.rss_start), (record.start + record.duration, record.rss_end)):
+                events.append({'name': 'rss_mb', 'ph': 'C', 'pid': pid, 'ts': ts * 1e6,
+                               'args': {'rss_mb': round(rss / 1024 ** 2, 1)}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        print(f"Chrome trace saved to {path}", file=sys.stderr)
+
+    def print_summary(self, file=sys.stderr):
+        print(f"\n{'stage':<40} {'calls':>6} {'total s':>10} {'rows out':>12} {'peak RSS MB':>12}", file=file)
+        for entry in self.summary():
+            print(f"{entry['name'][:40]:<40} {entry['calls']:>6} {entry['total_s']:>10.3f} "
+                  f"{entry['rows_out']:>12,} {entry['rss_peak_mb']:>12.1f}", file=file)
+
+
+class _StageContext:
+    __slots__ = ('profiler', 'record')
+
+    def __init__(self, profiler, record):
+        self.profiler, self.record = profiler, record
+
+    def __enter__(self):
+        self.profiler._enter(self.record)
+        return self.record
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.record.info['error'] = exc_type.__name__
+        self.profiler._exit(self.record)
+        return False
+
+
+# ============================================================================
+# PUBLIC API
+# ============================================================================
+
+def enable(allocations=False, cprofile_path=None, sample_interval=0.005):
+    """Turn instrumentation on for this process (idempotent). Returns the Profiler."""
+    global _active
+    if _active is None:
+        _active = Profiler(allocations, cprofile_path, sample_interval)
+    return _active
+
+
+def disable():
+    """Stop collecting and return the Profiler with everything recorded so far (None if it was off)."""
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def is_enabled():
+    return _active is not None
+
+
+def stage(name, category='stage', rows_in=None):
+    """Context manager timing a block; yields a Stage whose rows_out / info can be filled in."""
+    if _active is None:
+        return _NULL_STAGE
+    depth = len(_active._stack)
+    return _StageContext(_active, Stage(name, category, depth, rows_in))
+
+
+def timed(name=None, category='stage'):
+    """Decorator version of stage(). rows_in comes from the first DataFrame argument, rows_out /
+    mb_out from the returned frame (pandas or polars)."""
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            rows_in = next((rows for rows, _ in map(frame_stats, args) if rows is not None), None)
+            with stage(label, category, rows_in) as record:
+                result = func(*args, **kwargs)
+                record.rows_out, record.bytes_out = frame_stats(result)
+            return result
+        wrapper.__wrapped_by_instrumentation__ = True
+        return wrapper
+    return decorate
+
+
+def instrument(target, name=None, category='stage'):
+    """Wrap a function in place, given as 'module.function' or 'module.Class.method'."""
+    module_name, _, attr_path = target.partition('.')
+    parts = attr_path.split('.')
+    ## Longest importable module prefix: 'pandas.io.parsers.read_csv' -> module pandas.io.parsers
+    for split in range(len(parts) - 1, -1, -1):
+        try:
+            owner = importlib.import_module('.'.join([module_name] + parts[:split]))
+        except ImportError:
+            continue
+        for attr in parts[split:-1]:
+            owner = getattr(owner, attr)
+        break
+    else:
+        raise ImportError(f"instrument({target!r}): no module of {target!r} can be imported")
+    func = getattr(owner, parts[-1])
+    if getattr(func, '__wrapped_by_instrumentation__', False):
+        return
+    setattr(owner, parts[-1], timed(name or target, category)(func))
+
+
+## Data I/O entry points worth seeing in every trace: (target, label)
+IO_HOOKS = [
+    ('pandas.read_csv', 'pandas.read_csv'),
+    ('pandas.read_parquet', 'pandas.read_parquet'),
+    ('pandas.read_sql', 'pandas.read_sql'),
+    ('pandas.read_sql_query', 'pandas.read_sql_query'),
+    ('pandas.read_xml', 'pandas.read_xml'),
+    ('pandas.DataFrame.to_csv', 'pandas.to_csv'),
+    ('pandas.DataFrame.to_parquet', 'pandas.to_parquet'),
+    ('pandas.DataFrame.to_sql', 'pandas.to_sql'),
+    ('polars.read_csv', 'polars.read_csv'),
+    ('polars.read_parquet', 'polars.read_parquet'),
+    ('polars.LazyFrame.collect', 'polars.collect'),
+    ('polars.DataFrame.write_csv', 'polars.write_csv'),
+    ('polars.DataFrame.write_parquet', 'polars.write_parquet'),
+]
+
+
+def instrument_io():
+    """Time the pandas / polars readers and writers listed in IO_HOOKS (for libraries that are installed)."""
+    for target, label in IO_HOOKS:
+        try:
+            instrument(target, label, category='io')
+        except (ImportError, AttributeError):
+            pass
+
+
+def _write_outputs(profiler, json_path, trace_path, quiet):
+    if json_path:
+        profiler.write_json(json_path)
+    if trace_path:
+        profiler.write_chrome_trace(trace_path)
+    if not quiet:
+        profiler.print_summary()
+
+
+def enable_from_env():
+    """PIPELINE_PROFILE=<path>[.json] turns instrumentation on for scripts that import this module;
+    a Chrome trace is written at exit (and a stage JSON next to it, as <path>.stages.json)."""
+    path = os.environ.get('PIPELINE_PROFILE')
+    ## Worker processes inherit the variable too; only the parent writes the trace
+    if not path or _active is not None or multiprocessing.parent_process() is not None:
+        return
+    profiler = enable(allocations=os.environ.get('PIPELINE_PROFILE_ALLOCATIONS') == '1')
+    root, _ = os.path.splitext(path)
+    atexit.register(lambda: _write_outputs(disable() or profiler, f"{root}.stages.json", path, quiet=True))
+
+
+# ============================================================================
+# RUNNER: instrument any script from the command line
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run a pipeline script with stage timing, memory and row-count instrumentation.',
+        usage='python instrumentation.py [options] script.py [script args ...]')
+    parser.add_argument('--json', dest='json_path', help='write stage records and a per-stage summary as JSON')
+    parser.add_argument('--trace', dest='trace_path', help='write a Chrome trace (chrome://tracing, Perfetto)')
+    parser.add_argument('--cprofile', dest='cprofile_path', help='also record a cProfile .prof file')
+    parser.add_argument('--allocations', action='store_true', help='track Python allocation peaks (tracemalloc)')
+    parser.add_argument('--io', action='store_true', help='time pandas / polars readers and writers as stages')
+    parser.add_argument('--stage', dest='stages', action='append', default=[], metavar='MODULE.FUNC',
+                        help='time calls of this function as a stage (repeatable)')
+    parser.add_argument('--quiet', action='store_true', help="don't print the summary table")
+    parser.add_argument('script')
+    parser.add_argument('script_args', nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    ## Same sys.path / argv the script would see when run directly
+    sys.argv = [args.script] + args.script_args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+
+    for target in args.stages:
+        try:
+            instrument(target)
+        except (ImportError, AttributeError) as error:
+            parser.error(f"--stage {target}: {error}")
+    profiler = enable(args.allocations, args.cprofile_path)
+    if args.io:
+        instrument_io()
+
+    try:
+        with stage(os.path.basename(args.script), category='script'):
+            runpy.run_path(args.script, run_name='__main__')
+    finally:
+        disable()
+        _write_outputs(profiler, args.json_path, args.trace_path, args.quiet)
+
+
+enable_from_env()
+
+if __name__ == "__main__":
+    ## Register under the real module name too, so the script's `import instrumentation` shares this state
+    sys.modules.setdefault('instrumentation', sys.modules['__main__'])
+    main()
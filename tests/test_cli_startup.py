@@ -0,0 +1,95 @@
+# Start-up regression test for cli.py: `codex lookup --help` and a single code
+# lookup must stay on the standard library and within the start-up budget.
+#
+#   python -m pytest tests/test_cli_startup.py
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, 'cli.py')
+
+HEAVY_MODULES = {'pandas', 'polars', 'numpy', 'scipy'}
+STARTUP_BUDGET_S = 0.150
+RUNS = 5  # best of several runs, so one slow scheduler tick doesn't fail the test
+
+CODE_SET_ROWS = [
+    ('E11', 'false', 'Type 2 diabetes mellitus'),
+    ('E119', 'true', 'Type 2 diabetes mellitus without complications'),
+    ('F419', 'true', 'Anxiety disorder, unspecified'),
+    ('I10', 'true', 'Essential (primary) hypertension'),
+    ('Z0000', 'true', 'Encounter for general adult medical examination without abnormal findings'),
+]
+
+
+@pytest.fixture
+def code_set(tmp_path):
+    """Small code-set CSV in the layout compile_code_set writes (sorted by code)."""
+    path = tmp_path / 'icd10cm_small.csv'
+    lines = ['code,is_billable,description,last_updated']
+    lines += [f'{code},{billable},"{description}",2025-09-03' for code, billable, description in CODE_SET_ROWS]
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def _run(args, importtime=False):
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + [CLI] + args
+    return subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+
+
+def _imported_packages(args):
+    """Top-level packages imported by one cli.py run, from the -X importtime report on stderr."""
+    result = _run(args, importtime=True)
+    packages = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            name = line.rsplit('|', 1)[1].strip()
+            if name != 'package':
+                packages.add(name.split('.')[0])
+    return result, packages
+
+
+def _best_wall_time(args):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        _run(args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+COMMANDS = {
+    'help': lambda code_set: ['codex', 'lookup', '--help'],
+    'lookup': lambda code_set: ['codex', 'lookup', 'E11.9', '--code-set', code_set],
+}
+
+
+@pytest.mark.parametrize('command', sorted(COMMANDS))
+def test_no_heavy_imports(command, code_set):
+    result, packages = _imported_packages(COMMANDS[command](code_set))
+    assert result.returncode == 0, result.stderr
+    assert not packages & HEAVY_MODULES, f"imported {sorted(packages & HEAVY_MODULES)}"
+
+
+@pytest.mark.parametrize('command', sorted(COMMANDS))
+def test_startup_budget(command, code_set):
+    elapsed = _best_wall_time(COMMANDS[command](code_set))
+    assert elapsed < STARTUP_BUDGET_S, f"{command}: {elapsed * 1000:.0f} ms > {STARTUP_BUDGET_S * 1000:.0f} ms"
+
+
+def test_lookup_results(code_set):
+    found = _run(['codex', 'lookup', 'e119', 'Z00.00', 'E11', '--code-set', code_set])
+    assert found.returncode == 0, found.stderr
+    assert found.stdout.splitlines() == [
+        'E11.9\tbillable\tType 2 diabetes mellitus without complications',
+        'Z00.00\tbillable\tEncounter for general adult medical examination without abnormal findings',
+        'E11\theader\tType 2 diabetes mellitus',
+    ]
+
+    missing = _run(['codex', 'lookup', 'A000', '--code-set', code_set])
+    assert missing.returncode == 1
+    assert missing.stdout.strip() == 'A000\tnot found'
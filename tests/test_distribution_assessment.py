@@ -0,0 +1,44 @@
+# The batched normality tests in distribution_assessment.py must agree with scipy.stats.
+#
+#   python -m pytest tests/test_distribution_assessment.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'Assignment_3_Descriptive'))
+
+from distribution_assessment import _AD_SIGNIFICANCE, _anderson_normal, assess_distributions  # noqa: E402
+
+## scipy 1.17 warns that critical_values will give way to p-values; they are what is compared here
+pytestmark = pytest.mark.filterwarnings('ignore:As of SciPy:FutureWarning')
+
+
+@pytest.mark.parametrize('n', [20, 300, 5000])
+def test_anderson_matches_scipy(n):
+    rng = np.random.default_rng(n)
+    sample = np.column_stack([rng.normal(0, 1, n), rng.lognormal(0, 0.5, n), rng.uniform(0, 1, n)])
+    a2, critical = _anderson_normal(sample)
+    for j in range(sample.shape[1]):
+        expected = stats.anderson(sample[:, j], dist='norm')
+        assert a2[j] == pytest.approx(expected.statistic, rel=1e-9)
+        np.testing.assert_allclose(critical, expected.critical_values)
+        np.testing.assert_allclose(_AD_SIGNIFICANCE, expected.significance_level)
+
+
+def test_assess_distributions_anderson_decision():
+    ## sample_size above n: every row is tested, so the result must be scipy's on the whole column
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({'normal': rng.normal(50, 10, 300), 'skewed': rng.lognormal(1, 0.8, 300)})
+    table = assess_distributions(df, ['normal', 'skewed'], sample_size=1000).set_index('variable')
+    for col in df.columns:
+        expected = stats.anderson(df[col].to_numpy(), dist='norm')
+        crit_5pct = expected.critical_values[list(expected.significance_level).index(5.0)]
+        assert table.loc[col, 'anderson_stat'] == pytest.approx(expected.statistic, rel=1e-9)
+        assert table.loc[col, 'anderson_crit_5pct'] == pytest.approx(crit_5pct)
+        assert table.loc[col, 'normal_anderson'] == (expected.statistic < crit_5pct)
@@ -0,0 +1,54 @@
+# sparse_crosstab.py must give the same tables as pd.crosstab, including several row keys.
+#
+#   python -m pytest tests/test_sparse_crosstab.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'Assignment_3_Descriptive'))
+
+from sparse_crosstab import chi_square, crosstab_frame, sparse_crosstab  # noqa: E402
+
+
+@pytest.fixture
+def encounters():
+    rng = np.random.default_rng(3)
+    n = 4000
+    df = pd.DataFrame({
+        'icd10': rng.choice(['E11.9', 'I10', 'J18.9', 'N39.0'], n),
+        'cpt': rng.choice(['99213', '99214', '99223'], n),
+        'disposition': rng.choice(['Home', 'SNF', 'Expired'], n),
+    })
+    df.loc[rng.choice(n, size=80, replace=False), 'cpt'] = None
+    return df
+
+
+@pytest.mark.parametrize('normalize', [False, 'index', 'columns', 'all'])
+def test_multi_key_rows_match_pandas(encounters, normalize):
+    xtab = sparse_crosstab([encounters['icd10'], encounters['cpt']], encounters['disposition'],
+                           normalize=normalize)
+    dense = crosstab_frame(xtab, dense=True, margins=True)
+    expected = pd.crosstab([encounters['icd10'], encounters['cpt']], encounters['disposition'],
+                           normalize=normalize, margins=True)
+    assert list(dense.index) == list(expected.index)
+    np.testing.assert_allclose(dense.to_numpy(dtype=float), expected.to_numpy(dtype=float))
+
+
+def test_multi_key_chi_square_and_long_form(encounters):
+    xtab = sparse_crosstab([encounters['icd10'], encounters['cpt']], encounters['disposition'])
+    chi2, p_value, dof, _ = stats.chi2_contingency(
+        pd.crosstab([encounters['icd10'], encounters['cpt']], encounters['disposition']))
+    result = chi_square(xtab)
+    assert result['chi2'] == pytest.approx(chi2)
+    assert result['p_value'] == pytest.approx(p_value)
+    assert result['dof'] == dof
+
+    long = crosstab_frame(xtab)
+    assert list(long.columns) == ['icd10', 'cpt', 'column', 'value']
+    assert long['value'].sum() == encounters.dropna().shape[0]